@@ -0,0 +1,146 @@
+# ===============================================
+# aggregate.py — 실행별 분류 결과를 시간 버킷에 누적 (일일 다이제스트 / 최근 N일 리포트용)
+# ===============================================
+# 발송 실행(send / force_send)마다 새로 본 기사(지난 집계 이후 pubDate)를 시간 버킷에 더한다:
+#   status  = 상태별 기사 수 (include_fail / exclude_hit / passed)
+#   include = 포함 키워드별 히트 수, exclude = 제외 키워드별 히트 수
+#   outlet  = 최종 통과 기사의 언론사(originallink 호스트)별 수
+#   sent    = 본 채널로 보낸 묶음 수, latency = 보낸 묶음의 pubDate → 발송 지연(초, 합계 / 최대)
+# 기사 버킷은 pubDate 기준 KST 1시간, 발송 버킷은 발송 시각 기준.
+# 조회는 구간 안 버킷 합계(SQL GROUP BY)라 네이버 / 원본 로그를 다시 보지 않는다.
+# HOURLY_KEEP_DAYS 가 지난 시간 버킷은 하루 버킷으로 합치고, DAILY_KEEP_DAYS 가 지나면 지운다.
+import urllib.parse
+from datetime import datetime, timedelta
+
+from pipeline import KST, STATUS_EXCLUDE_HIT, STATUS_INCLUDE_FAIL, STATUS_PASSED
+
+HOUR = 3600
+DAY = 86400
+KST_OFFSET = 9 * HOUR          # 하루 버킷 경계를 KST 자정에 맞춘다
+HOURLY_KEEP_DAYS = 3
+DAILY_KEEP_DAYS = 400
+COMPACT_INTERVAL = DAY         # 압축은 이 간격으로 한 번 (fold 때 확인)
+FOLDED_STATUSES = (STATUS_INCLUDE_FAIL, STATUS_EXCLUDE_HIT, STATUS_PASSED)
+
+def bucket_start(ts, width=HOUR):
+    """epoch 초 → 그 시각이 든 버킷 시작 (KST 경계)"""
+    ts = int(ts)
+    return (ts + KST_OFFSET) // width * width - KST_OFFSET
+
+def day_start(dt):
+    """datetime → 그 KST 날짜 자정 epoch 초"""
+    return bucket_start(dt.timestamp(), DAY)
+
+def outlet_of(article):
+    host = urllib.parse.urlsplit(article.get("originallink") or article.get("link") or "").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+def fold_articles(articles):
+    """기사 목록 → {(bucket, metric, label): [count, total, peak]} (시간 버킷)"""
+    cells = {}
+
+    def add(ts, metric, label, value=None):
+        cell = cells.setdefault((bucket_start(ts), metric, label), [0, 0.0, 0.0])
+        cell[0] += 1
+        if value is not None:
+            cell[1] += value
+            cell[2] = max(cell[2], value)
+
+    for a in articles:
+        ts = a["pub_dt"].timestamp()
+        add(ts, "status", a["status"])
+        for kw in a.get("include_hits") or ():
+            add(ts, "include", kw)
+        for kw in a.get("exclude_hits") or ():
+            add(ts, "exclude", kw)
+        if a["status"] == STATUS_PASSED:
+            add(ts, "outlet", outlet_of(a))
+    return cells
+
+def fold_sent(clusters, sent_at):
+    """보낸 묶음 → 발송 수 / 지연 칸 (발송 시각 버킷)"""
+    cells = {}
+    ts = sent_at.timestamp()
+    for c in clusters:
+        latency = max(0.0, ts - c["article"]["pub_dt"].timestamp())
+        for metric, value in (("sent", None), ("latency", latency)):
+            cell = cells.setdefault((bucket_start(ts), metric, ""), [0, 0.0, 0.0])
+            cell[0] += 1
+            if value is not None:
+                cell[1] += value
+                cell[2] = max(cell[2], value)
+    return cells
+
+class Aggregates:
+    """StateStore 의 agg_buckets 위 집계 (쓰기는 호출 측 트랜잭션 안에서)"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def fold(self, scope, articles, sent_clusters=(), sent_at=None):
+        """
+        새로 본 기사(상태가 FOLDED_STATUSES 이고 지난 집계 시각 이후 pubDate)와 보낸 묶음을 더한다.
+        반환: 더한 기사 수
+        """
+        mark_key = f"{scope}|agg_checked" if scope else "agg_checked"
+        mark = self.store.get_time(mark_key)
+        fresh = [a for a in articles
+                 if a["status"] in FOLDED_STATUSES and (mark is None or a["pub_dt"] > mark)]
+        cells = fold_articles(fresh)
+        if sent_clusters and sent_at is not None:
+            cells.update(fold_sent(sent_clusters, sent_at))
+        if cells:
+            self.store.add_buckets([(scope, HOUR, b, metric, label, count, total, peak)
+                                    for (b, metric, label), (count, total, peak) in cells.items()])
+        if fresh:
+            self.store.set_time(mark_key, max(a["pub_dt"] for a in fresh))
+        self.maybe_compact()
+        return len(fresh)
+
+    def maybe_compact(self, now=None):
+        """마지막 압축 뒤 COMPACT_INTERVAL 이 지났으면 오래된 시간 버킷 → 하루 버킷, 보관 기간 지난 버킷 삭제"""
+        now = now or datetime.now(KST)
+        last = self.store.get_time("agg_compacted")
+        if last is not None and (now - last).total_seconds() < COMPACT_INTERVAL:
+            return 0
+        today = day_start(now)
+        n = self.store.compact_buckets(HOUR, DAY, today - HOURLY_KEEP_DAYS * DAY, KST_OFFSET,
+                                       today - DAILY_KEEP_DAYS * DAY)
+        self.store.set_time("agg_compacted", now)
+        return n
+
+    def totals(self, scope, since, until):
+        """[since, until) (datetime) 합계 → {metric: {label: (count, total, peak)}}"""
+        out = {}
+        for metric, label, count, total, peak in self.store.sum_buckets(
+                bucket_start(since.timestamp()), bucket_start(until.timestamp()), scope):
+            out.setdefault(metric, {})[label] = (count, total, peak)
+        return out
+
+def _top(counts, n):
+    ranked = sorted(counts.items(), key=lambda kv: (-kv[1][0], kv[0]))[:n]
+    return " · ".join(f"{label or '?'} {count}" for label, (count, _, _) in ranked)
+
+def digest_lines(totals, since, until, top_n=5, profile_name=None):
+    """집계 합계 → 관리자 다이제스트 줄 목록"""
+    status = totals.get("status", {})
+    seen = sum(count for count, _, _ in status.values())
+    passed = status.get(STATUS_PASSED, (0, 0, 0))[0]
+    excluded = status.get(STATUS_EXCLUDE_HIT, (0, 0, 0))[0]
+    sent, _, _ = totals.get("sent", {}).get("", (0, 0, 0))
+    lat_count, lat_total, lat_peak = totals.get("latency", {}).get("", (0, 0, 0))
+
+    last_day = until - timedelta(seconds=1)
+    span = since.strftime("%m-%d") if since.date() == last_day.date() else \
+        f"{since.strftime('%m-%d')} ~ {last_day.strftime('%m-%d')}"
+    lines = []
+    if profile_name:
+        lines.append(f"🏷️ {profile_name}")
+    lines.append(f"📈 다이제스트 {span}")
+    lines.append(f"새 기사 {seen} · 통과 {passed} · 제외 {excluded} · 발송 {sent}묶음")
+    if lat_count:
+        lines.append(f"(발송 지연) 평균 {lat_total / lat_count / 60:.0f}분 / 최대 {lat_peak / 60:.0f}분")
+    for metric, title in (("include", "포함 키워드"), ("exclude", "제외 키워드"), ("outlet", "언론사")):
+        if totals.get(metric):
+            lines.append(f"({title}) {_top(totals[metric], top_n)}")
+    return lines
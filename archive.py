@@ -0,0 +1,108 @@
+# ===============================================
+# archive.py — 네이버 원본 응답 / 발송 기록 보관 (gzip JSONL) + 재생 원천
+# ===============================================
+# 파일: {RECORD_DIR}/naver-YYYY-MM-DD.jsonl.gz (KST 날짜별)
+# 실행 하나의 기록을 모아 두었다가 flush() 때 gzip 멤버 하나로 덧붙인다
+# (여러 멤버가 이어진 gzip 도 gzip.open 으로 그대로 읽힌다).
+# 레코드:
+#   {"type": "response", "fetched_at", "query", "start", "display", "status", "body": 원본 JSON 문자열}
+#   {"type": "sent", "sent_at", "profile", "articles": [{"title", "link", "keys"}]}
+import glob
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+
+from pipeline import KST, PageEnd
+
+class ArchiveWriter:
+    """스레드 안전 버퍼 + 실행 끝에 한 번 덧붙이기"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pending = []
+        os.makedirs(directory, exist_ok=True)
+
+    def record_response(self, query, start, display, status, body):
+        self._add({
+            "type": "response",
+            "fetched_at": datetime.now(KST).isoformat(),
+            "query": query,
+            "start": start,
+            "display": display,
+            "status": status,
+            "body": body,
+        })
+
+    def record_sent(self, profile, articles):
+        self._add({
+            "type": "sent",
+            "sent_at": datetime.now(KST).isoformat(),
+            "profile": profile,
+            "articles": [{"title": a["title"], "link": a["link"], "keys": a["keys"]} for a in articles],
+        })
+
+    def _add(self, record):
+        with self.lock:
+            self.pending.append(record)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return 0
+        day = datetime.now(KST).strftime("%Y-%m-%d")
+        path = os.path.join(self.directory, f"naver-{day}.jsonl.gz")
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in pending)
+        with open(path, "ab") as f:
+            f.write(gzip.compress(data.encode("utf-8")))
+        return len(pending)
+
+def archive_files(directory, since=None, until=None):
+    """보관 파일 목록 (날짜순). since/until 은 "YYYY-MM-DD" (포함)"""
+    files = []
+    for path in sorted(glob.glob(os.path.join(directory, "naver-*.jsonl.gz"))):
+        day = os.path.basename(path)[len("naver-"):-len(".jsonl.gz")]
+        if (since and day < since) or (until and day > until):
+            continue
+        files.append(path)
+    return files
+
+def iter_records(paths):
+    """보관 파일들의 레코드를 순서대로 (기록 중이라 끝이 잘린 파일은 읽을 수 있는 데까지)"""
+    for path in paths:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, OSError) as e:
+            print(f"⚠️ 보관 파일 끝 손상 ({os.path.basename(path)}): {e}")
+
+def replay_source(records, queries=None, sent=None):
+    """
+    보관 레코드 → 파이프라인 원천 (네트워크 없음): 200 응답마다 원본 항목(+call_no) … PageEnd
+    - queries 를 주면 그 쿼리 응답만
+    - sent 목록을 주면 지나가는 발송 레코드를 거기 모은다 (파일을 한 번만 읽도록)
+    """
+    n = 0
+    for rec in records:
+        kind = rec.get("type")
+        if kind == "sent":
+            if sent is not None:
+                sent.append(rec)
+            continue
+        if kind != "response" or rec.get("status") != 200:
+            continue
+        if queries is not None and rec.get("query") not in queries:
+            continue
+        try:
+            items = json.loads(rec["body"]).get("items", [])
+        except (ValueError, TypeError, AttributeError):
+            continue
+        n += 1
+        for item in items:
+            yield {**item, "call_no": n}
+        yield PageEnd(n, rec.get("query"), len(items), rec.get("display"))
@@ -0,0 +1,158 @@
+# ===============================================
+# article_fetch.py — 애매한 기사(제목·요약 포함 필터 미통과)의 본문(originallink) 가져오기
+# ===============================================
+# - 스레드 풀(workers) + 언론사 호스트별 동시 요청 제한(per_host)
+# - 요청마다 connect/read 타임아웃, 응답 크기 상한, 실행 전체 마감(deadline_s) / 요청 수 상한(max_fetches)
+#   → 느린 언론사가 있어도 실행 시간은 마감 이상 늘지 않는다 (마감을 넘긴 요청은 버리고 캐시하지 않음)
+# - 추출 텍스트는 StateStore.page_cache 에 URL 별로 저장 (성공 TTL / 실패 TTL, 최근 사용순 상한)
+import html
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 5
+MAX_BYTES = 512 * 1024      # 응답은 앞부분만 (기사 본문은 보통 앞쪽)
+TEXT_CHARS = 20000          # 캐시에 저장하는 추출 텍스트 길이
+CACHE_TTL_DAYS = 3
+FAIL_TTL_SECONDS = 3600     # 실패(4xx/5xx/타임아웃)는 1시간 뒤 다시 시도
+CACHE_MAX_ENTRIES = 5000
+
+_DROP_RE = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.I)
+
+def extract_text(raw, declared=None):
+    """HTML 바이트 → 본문 텍스트 (스크립트/스타일/태그 제거, 공백 정리). 인코딩: 헤더 → meta → utf-8"""
+    encoding = declared
+    if not encoding:
+        m = _META_CHARSET_RE.search(raw[:4096])
+        encoding = m.group(1).decode("ascii", "ignore") if m else "utf-8"
+    try:
+        text = raw.decode(encoding, errors="replace")
+    except LookupError:
+        text = raw.decode("utf-8", errors="replace")
+    text = _TAG_RE.sub(" ", _DROP_RE.sub(" ", text))
+    return _WS_RE.sub(" ", html.unescape(text)).strip()[:TEXT_CHARS]
+
+class PageCache:
+    """본문 캐시 (StateStore.page_cache): 성공은 CACHE_TTL_DAYS, 실패는 FAIL_TTL_SECONDS 동안 재사용"""
+
+    def __init__(self, store, ttl_days=CACHE_TTL_DAYS, fail_ttl=FAIL_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.store = store
+        self.ttl = ttl_days * 86400
+        self.fail_ttl = fail_ttl
+        self.max_entries = max_entries
+
+    def get(self, urls):
+        """{url: text 또는 None(실패)} — 만료된 항목은 없는 것으로"""
+        now = time.time()
+        found = {}
+        for url, (ok, text, fetched_at) in self.store.get_pages(list(urls), now).items():
+            if now - fetched_at < (self.ttl if ok else self.fail_ttl):
+                found[url] = text if ok else None
+        return found
+
+    def put(self, pages):
+        """pages = {url: text 또는 None(실패)}"""
+        if not pages:
+            return
+        now = time.time()
+        self.store.put_pages([(url, text is not None, text or "") for url, text in pages.items()], now)
+        self.store.evict_pages(now - self.ttl, now - self.fail_ttl, self.max_entries)
+
+class ArticleFetcher:
+    """
+    실행 하나 동안 쓰는 본문 가져오기. 마감은 처음 texts() 를 부를 때부터 잰다.
+    stats: 요청 URL / 캐시 히트 / 가져옴 / 실패 / 마감·상한으로 못 본 수, 소요 ms
+    """
+
+    def __init__(self, cache, user_agent, workers=8, per_host=2, deadline_s=10.0, max_fetches=30):
+        self.cache = cache
+        self.workers = workers
+        self.per_host = per_host
+        self.deadline_s = deadline_s
+        self.remaining = max_fetches
+        self.deadline = None
+        self.memo = {}
+        self.hosts = {}
+        self.hosts_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+        self.stats = {"urls": 0, "cached": 0, "fetched": 0, "failed": 0, "skipped": 0, "ms": 0.0}
+
+    def _host_slot(self, url):
+        host = urllib.parse.urlsplit(url).hostname or ""
+        with self.hosts_lock:
+            sem = self.hosts.get(host)
+            if sem is None:
+                sem = self.hosts[host] = threading.BoundedSemaphore(self.per_host)
+        return sem
+
+    def _fetch(self, url):
+        """반환: 텍스트, None(실패), 또는 False(마감까지 호스트 자리가 안 남 — 캐시 안 함)"""
+        sem = self._host_slot(url)
+        if not sem.acquire(timeout=max(0.0, self.deadline - time.monotonic())):
+            return False
+        try:
+            with self.session.get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), stream=True) as r:
+                if r.status_code != 200:
+                    return None
+                raw = bytearray()
+                for chunk in r.iter_content(16384):
+                    raw += chunk
+                    if len(raw) >= MAX_BYTES or time.monotonic() > self.deadline:
+                        break
+                declared = r.encoding if "charset" in r.headers.get("Content-Type", "").lower() else None
+                return extract_text(bytes(raw), declared)
+        except requests.RequestException:
+            return None
+        finally:
+            sem.release()
+
+    def texts(self, urls):
+        """{url: 본문 텍스트 또는 None} — 캐시 → 남은 것 동시 요청 (마감 / 요청 수 상한까지)"""
+        t0 = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = time.monotonic() + self.deadline_s
+        urls = [u for u in dict.fromkeys(urls) if u]
+        self.stats["urls"] += len(urls)
+        todo = [u for u in urls if u not in self.memo]
+        cached = self.cache.get(todo) if todo else {}
+        self.stats["cached"] += len(cached)
+        self.memo.update(cached)
+        todo = [u for u in todo if u not in cached]
+
+        allowed = todo[:max(0, self.remaining)] if time.monotonic() < self.deadline else []
+        self.remaining -= len(allowed)
+        self.stats["skipped"] += len(todo) - len(allowed)
+        if allowed:
+            pool = ThreadPoolExecutor(max_workers=min(self.workers, len(allowed)))
+            futures = {pool.submit(self._fetch, u): u for u in allowed}
+            done, pending = wait(futures, timeout=max(0.0, self.deadline - time.monotonic()))
+            pool.shutdown(wait=False, cancel_futures=True)   # 마감을 넘긴 요청은 기다리지 않는다
+            fresh = {}
+            for f in done:
+                text = f.result()
+                if text is False:
+                    self.stats["skipped"] += 1
+                    continue
+                fresh[futures[f]] = text
+                self.stats["fetched" if text is not None else "failed"] += 1
+            self.stats["skipped"] += len(pending)
+            self.memo.update(fresh)
+            try:
+                self.cache.put(fresh)
+            except Exception as e:
+                print("⚠️ 본문 캐시 기록 예외:", e)
+        self.stats["ms"] += (time.perf_counter() - t0) * 1000
+        return {u: self.memo.get(u) for u in urls}
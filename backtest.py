@@ -0,0 +1,145 @@
+# ===============================================
+# backtest.py — 보관한 네이버 응답(RECORD_DIR)으로 키워드 후보 재생 평가 (네트워크 / 기록 없음)
+# ===============================================
+# 보관 응답을 발송과 같은 파이프라인(정규화 → 중복 → 포함/제외)으로 다시 흘려서
+# 현재 키워드와 후보 키워드의 통과 목록을 실제 발송 기록과 비교한다.
+#   정밀도 = 통과 중 실제 발송된 비율 / 재현율 = 실제 발송 중 통과한 비율
+# 사용:
+#   python backtest.py --filter new_filter.txt [--exclude new_exclude.txt]
+#                      [--profile 이름] [--since 2026-10-01] [--until 2026-10-14] [--dir /data/archive]
+#                      [--any-query] [--show 20]
+import argparse
+import sys
+import time
+
+from archive import archive_files, iter_records, replay_source
+from keyword_matcher import compile_matcher, load_keywords, load_weighted_keywords
+from main import RECORD_DIR, get_profiles
+from pipeline import (
+    STATUS_PASSED,
+    PageCounters,
+    classify_stages,
+    collect,
+    compose,
+    item_stage,
+    normalize,
+)
+from profiles import search_queries
+
+class NoHistory:
+    """발송 기록 없이 재생 (기간 안 기사는 한 번씩만 흘러가므로 중복 판정은 unique 단계 몫)"""
+
+    def seen(self, keys):
+        return False
+
+def unique():
+    """같은 기사(키 하나라도 겹침)는 처음 본 것만 — 보관 응답은 조회마다 겹친다"""
+    seen = set()
+    def fn(a):
+        if any(k in seen for k in a["keys"]):
+            return None
+        seen.update(a["keys"])
+        return a
+    return item_stage(fn)
+
+def passed_articles(articles, matcher):
+    """정규화된 기사 목록에 분류 단계를 적용해서 최종 통과 기사만"""
+    counters = PageCounters()
+    stages = classify_stages(matcher, NoHistory(), None, counters)
+    return [a for a in collect(compose(iter(articles), *stages), counters) if a["status"] == STATUS_PASSED]
+
+def score(passed, sent_keys, sent_total):
+    hits = sum(1 for a in passed if any(k in sent_keys for k in a["keys"]))
+    precision = hits / len(passed) if passed else 0.0
+    recall = hits / sent_total if sent_total else 0.0
+    return {"passed": len(passed), "hits": hits, "precision": precision, "recall": recall}
+
+def diff(a_list, b_list):
+    """b 에만 있는 기사 (키 기준)"""
+    keys = {k for a in a_list for k in a["keys"]}
+    return [b for b in b_list if not any(k in keys for k in b["keys"])]
+
+def print_titles(label, articles, sent_keys, show):
+    print(f"{label} ({len(articles)}건)")
+    for a in articles[:show]:
+        mark = "📨" if any(k in sent_keys for k in a["keys"]) else "  "
+        print(f" {mark} {a['pub_dt'].strftime('%m-%d %H:%M')} {a['title']}")
+    if len(articles) > show:
+        print(f"    … 외 {len(articles) - show}건")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="보관 응답으로 키워드 후보 재생 평가")
+    parser.add_argument("--filter", help="후보 포함 키워드 파일 (없으면 현재 파일)")
+    parser.add_argument("--exclude", help="후보 제외 키워드 파일 (없으면 현재 파일)")
+    parser.add_argument("--profile", help="프로필 이름 (기본: 첫 프로필)")
+    parser.add_argument("--dir", default=RECORD_DIR, help="보관 폴더 (기본: RECORD_DIR)")
+    parser.add_argument("--since", help="시작 날짜 YYYY-MM-DD (포함)")
+    parser.add_argument("--until", help="끝 날짜 YYYY-MM-DD (포함)")
+    parser.add_argument("--any-query", action="store_true", help="프로필 검색어와 다른 쿼리 응답도 사용")
+    parser.add_argument("--show", type=int, default=20, help="변화 목록 최대 출력 건수")
+    args = parser.parse_args(argv)
+
+    if not args.dir:
+        print("❌ 보관 폴더 없음 (RECORD_DIR 또는 --dir)")
+        return 1
+    profiles = get_profiles()
+    profile = next((p for p in profiles if p["name"] == args.profile), None) if args.profile else profiles[0]
+    if profile is None:
+        print(f"❌ 프로필 없음: {args.profile}")
+        return 1
+    files = archive_files(args.dir, args.since, args.until)
+    if not files:
+        print(f"❌ 보관 파일 없음: {args.dir}")
+        return 1
+
+    t0 = time.perf_counter()
+    queries = None
+    if not args.any_query:
+        queries = set(search_queries(load_keywords(profile["search_keywords_file"]), profile["search_mode"]))
+
+    # 1) 보관 응답 → 정규화 → 기간 내 중복 제거 (한 번만 읽고, 두 키워드 묶음이 같은 목록을 쓴다)
+    sent_records = []
+    counters = PageCounters()
+    articles = collect(compose(replay_source(iter_records(files), queries, sent_records),
+                               normalize(counters), unique()), counters)
+    responses = len(counters.ended)
+
+    # 2) 실제 발송 (이 프로필, 같은 기간 파일)
+    sent_keys = set()
+    sent_total = 0
+    for rec in sent_records:
+        if rec.get("profile") != profile["name"]:
+            continue
+        for a in rec.get("articles", []):
+            if not any(k in sent_keys for k in a["keys"]):
+                sent_total += 1
+            sent_keys.update(a["keys"])
+
+    # 3) 현재 / 후보 키워드로 분류
+    current_include = list(load_weighted_keywords(profile["filter_keywords_file"]))
+    current_exclude = load_keywords(profile["exclude_keywords_file"])
+    current = passed_articles(articles, compile_matcher(current_include, current_exclude))
+    candidate = passed_articles(articles, compile_matcher(
+        list(load_weighted_keywords(args.filter)) if args.filter else current_include,
+        load_keywords(args.exclude) if args.exclude else current_exclude,
+    ))
+    elapsed = time.perf_counter() - t0
+
+    if responses == 0:
+        print("⚠️ 프로필 검색어와 같은 쿼리의 응답이 없음 (검색어가 바뀌었으면 --any-query)")
+
+    cur, cand = score(current, sent_keys, sent_total), score(candidate, sent_keys, sent_total)
+    print(f"📼 [{profile['name']}] 보관 파일 {len(files)}개 · 응답 {responses}건 · 기사 {len(articles)}건 · "
+          f"실제 발송 {sent_total}건 — {elapsed:.2f}초")
+    print(f"{'':10}{'통과':>7}{'발송일치':>9}{'정밀도':>9}{'재현율':>9}")
+    for label, s in (("현재", cur), ("후보", cand)):
+        print(f"{label:10}{s['passed']:>7}{s['hits']:>9}{s['precision']:>9.1%}{s['recall']:>9.1%}")
+    print(f"{'변화':10}{cand['passed'] - cur['passed']:>+7}{cand['hits'] - cur['hits']:>+9}"
+          f"{(cand['precision'] - cur['precision']) * 100:>+8.1f}p{(cand['recall'] - cur['recall']) * 100:>+8.1f}p")
+    print()
+    print_titles("➕ 후보에서 새로 통과", diff(current, candidate), sent_keys, args.show)
+    print_titles("➖ 후보에서 탈락", diff(candidate, current), sent_keys, args.show)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# ===============================================
+# bench.py — 로컬 대역 서버 기반 종단 벤치마크 (실제 API 호출 없음)
+# ===============================================
+# 사용: python bench.py [--scenario quiet match_day api_errors slow_tail outage] [--target run_bot ...] [--repeat N]
+#                      [--json out.json]
+#       python bench.py --startup [--repeat N]   # 시작 비용만 (새 프로세스: import / 키워드 준비 / 저장소 열기)
+# 측정: 실행 시간 / 네이버·텔레그램 호출 수 / 송수신 바이트 / 최대 메모리
+#       / 페이지 조회(재시도·헤지 포함) p50·p95·최대 ms, 재시도·헤지·실패 수 (프로세스 안 대상만)
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from fake_servers import KST, SCENARIOS, FakeServers
+
+TARGETS = ["search_recent_news", "run_bot", "preview_run", "force_send"]
+WATERMARK_HOURS = 2          # 벤치 시작 시 last_checked = 현재 - 2시간
+LEARN_HOURS = 6              # 측정 전 유입률 학습용으로 한 번 끝까지 조회하는 구간 (--cold 면 생략)
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _configure_env(servers, mount):
+    """main 을 import 하기 전에 대역 서버 / 임시 저장소로 환경변수를 맞춘다."""
+    os.environ.update({
+        "NAVER_API_URL": servers.naver_url,
+        "TELEGRAM_API_URL": servers.telegram_url,
+        "NAVER_CLIENT_ID": "bench",
+        "NAVER_CLIENT_SECRET": "bench",
+        "TELEGRAM_BOT_TOKEN": "bench-token",
+        "TELEGRAM_CHAT_ID": "bench-channel",
+        "ADMIN_CHAT_ID": "bench-admin",
+        "PERSISTENT_MOUNT": mount,
+    })
+
+def _reset_state(bot, mount, now, learn=True):
+    """
+    이전 측정의 기록 파일 / 프로세스 캐시를 지우고 watermark 를 다시 찍는다.
+    learn: 지난 실행들로 유입률을 배운 상태를 흉내 — LEARN_HOURS 구간을 한 번 조회 (측정 전, 통계는 이후 초기화)
+    """
+    if bot._store is not None:
+        bot._store.close()
+        bot._store = None
+    for name in os.listdir(mount):
+        path = os.path.join(mount, name)
+        if os.path.isfile(path):
+            os.remove(path)
+    bot._call_counter = None
+    bot._breaker = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if learn:
+            bot.begin_run("bench_learn")
+            bot.fetch_news(" ".join(bot.load_keywords(bot.SEARCH_KEYWORDS_FILE)), now - timedelta(hours=LEARN_HOURS))
+            # 학습 조회 실패(outage)로 열린 서킷은 측정 전에 닫는다 — 측정은 재시도 소진 경로부터
+            bot.get_store().set("breaker|naver", "")
+            bot._breaker = None
+        bot.mark_checked_time(now - timedelta(hours=WATERMARK_HOURS))
+
+def _measure_inprocess(fn, verbose):
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with out:
+        fn()
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wall, peak, "tracemalloc"
+
+def _measure_script(script, verbose):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, script], cwd=REPO_DIR, env=os.environ.copy(),
+        stdout=None if verbose else subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+    _, _, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    return wall, usage.ru_maxrss * 1024, "maxrss"
+
+# 새 프로세스에서 시작 단계별 ms 를 JSON 한 줄로 출력 (import 는 인터프리터 기동 뒤부터)
+_STARTUP_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+rec = {}
+main.get_keyword_snapshot(main.get_profiles(), rec)
+t2 = time.perf_counter()
+main.get_store()
+t3 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "keywords_ms": (t2 - t1) * 1000,
+                  "store_ms": (t3 - t2) * 1000, "source": rec["source"]}))
+"""
+
+def run_startup_bench(repeat=5):
+    """
+    시작 비용: cold = 키워드 스냅샷 없음(원본 읽기 + 컴파일 후 기록), warm = 스냅샷 파일 한 번 읽기.
+    저장소 첫 생성(기존 파일 이전)은 측정 전에 한 번 해 두고, 측정은 이미 있는 저장소 열기.
+    값은 중앙값, process_ms 는 인터프리터 기동 포함 전체.
+    """
+    mount = tempfile.mkdtemp(prefix="fcanews-startup-")
+    env = {**os.environ, "PERSISTENT_MOUNT": mount}
+    snapshot = os.path.join(mount, "keyword_snapshot.pickle")
+
+    def probe():
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], cwd=REPO_DIR, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        return {**json.loads(out.strip().splitlines()[-1]), "process_ms": (time.perf_counter() - t0) * 1000}
+
+    results = []
+    try:
+        probe()   # 저장소 첫 생성(기존 파일 이전)은 측정에서 뺀다
+        for case in ("cold", "warm"):
+            runs = []
+            for _ in range(repeat):
+                if case == "cold" and os.path.exists(snapshot):
+                    os.remove(snapshot)
+                runs.append(probe())
+            median = lambda k: round(sorted(r[k] for r in runs)[len(runs) // 2], 1)
+            results.append({"case": case, "source": runs[-1]["source"],
+                            **{k: median(k) for k in ("process_ms", "import_ms", "keywords_ms", "store_ms")}})
+    finally:
+        shutil.rmtree(mount, ignore_errors=True)
+    return results
+
+def _fetch_stats(events):
+    """naver_fetch(페이지 조회 1건 = 재시도·헤지 포함) 이벤트 → 꼬리 지연 / 판단 수"""
+    events = [e for e in events if e["phase"] == "naver_fetch"]
+    ms = sorted(e["duration_ms"] for e in events)
+    pick = lambda q: round(ms[min(len(ms) - 1, int(q * len(ms)))]) if ms else "-"
+    return {
+        "fetch_p50_ms": pick(0.5),
+        "fetch_p95_ms": pick(0.95),
+        "fetch_max_ms": round(ms[-1]) if ms else "-",
+        "retries": sum(e.get("retries", 0) for e in events),
+        "hedged": sum(e.get("hedged", 0) for e in events),
+        "failed": sum(1 for e in events if e.get("error")),
+    }
+
+def run_bench(scenarios, targets, verbose=False, learn=True, repeat=1):
+    """
+    repeat > 1 이면 대상마다 기사 목록(시드)을 바꿔 가며 여러 번 재고,
+    wall_s 는 중앙값, 호출·바이트는 1회 평균, 조회 지연 백분위는 전체 조회를 모아서 계산한다.
+    """
+    mount = tempfile.mkdtemp(prefix="fcanews-bench-")
+    servers = FakeServers(scenarios[0])
+    _configure_env(servers, mount)
+    os.chdir(REPO_DIR)
+    import main as bot  # 환경변수 설정 후 import
+
+    results = []
+    try:
+        for scenario in scenarios:
+            for target in targets:
+                walls, peaks, totals, events = [], [], {}, []
+                for i in range(repeat):
+                    servers.seed = 7 + i
+                    now = datetime.now(KST)
+                    servers.use(scenario, now=now)
+                    _reset_state(bot, mount, now, learn=learn)
+                    servers.use(scenario, now=now)   # 학습 조회 통계 / 오류 주입 난수 초기화 (같은 기사 목록)
+                    bot.begin_run("bench")
+                    if target == "search_recent_news":
+                        fn = lambda: bot.search_recent_news(
+                            bot.load_keywords(bot.SEARCH_KEYWORDS_FILE),
+                            list(bot.load_weighted_keywords(bot.FILTER_KEYWORDS_FILE)),
+                            bot.load_keywords(bot.EXCLUDE_KEYWORDS_FILE),
+                        )
+                        wall, peak, mem_kind = _measure_inprocess(fn, verbose)
+                    elif target == "run_bot":
+                        even_hour = now.replace(hour=now.hour - now.hour % 2, minute=0, second=0, microsecond=0)
+                        wall, peak, mem_kind = _measure_inprocess(lambda: bot.run_bot(now=even_hour), verbose)
+                    else:
+                        wall, peak, mem_kind = _measure_script(f"{target}.py", verbose)
+                    walls.append(wall)
+                    peaks.append(peak)
+                    stats = servers.stats()
+                    for name, value in (
+                        ("naver_calls", stats["naver"]["calls"]),
+                        ("naver_errors", stats["naver"]["errors"]),
+                        ("naver_bytes", stats["naver"]["bytes_out"]),
+                        ("telegram_calls", stats["telegram"]["calls"]),
+                        ("telegram_messages", stats["telegram"]["messages"]),
+                        ("telegram_bytes", stats["telegram"]["bytes_in"]),
+                    ):
+                        totals[name] = totals.get(name, 0) + value
+                    if target in ("search_recent_news", "run_bot"):
+                        events += bot.run_metrics.to_dict()["events"]
+                avg = lambda v: v // repeat if v % repeat == 0 else round(v / repeat, 1)
+                results.append({
+                    "scenario": scenario,
+                    "target": target,
+                    "wall_s": round(sorted(walls)[len(walls) // 2], 3),
+                    **{name: avg(v) for name, v in totals.items()},
+                    "peak_mem_kb": max(peaks) // 1024,
+                    "mem_kind": mem_kind,
+                    **(_fetch_stats(events) if events else {}),
+                })
+    finally:
+        servers.shutdown()
+        shutil.rmtree(mount, ignore_errors=True)
+    return results
+
+def print_table(results, cols=None):
+    cols = cols or ["scenario", "target", "wall_s", "naver_calls", "naver_errors", "naver_bytes",
+                    "telegram_calls", "telegram_bytes", "peak_mem_kb",
+                    "fetch_p50_ms", "fetch_p95_ms", "fetch_max_ms", "retries", "hedged", "failed"]
+    widths = {c: max(len(c), *(len(str(r.get(c, "-"))) for r in results)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in results:
+        print("  ".join(str(r.get(c, "-")).ljust(widths[c]) for c in cols))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fcanews 종단 벤치마크")
+    parser.add_argument("--scenario", nargs="+", default=list(SCENARIOS), choices=sorted(SCENARIOS))
+    parser.add_argument("--target", nargs="+", default=TARGETS, choices=TARGETS)
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--verbose", action="store_true", help="봇 출력 그대로 보기")
+    parser.add_argument("--cold", action="store_true", help="유입률 학습 없이 측정 (첫 실행 상태)")
+    parser.add_argument("--repeat", type=int, default=1, help="대상마다 반복 횟수 (꼬리 지연 측정용)")
+    parser.add_argument("--startup", action="store_true", help="시작 비용만 측정 (repeat 기본 5)")
+    args = parser.parse_args()
+
+    if args.startup:
+        results = run_startup_bench(max(5, args.repeat))
+        print_table(results, ["case", "source", "process_ms", "import_ms", "keywords_ms", "store_ms"])
+    else:
+        results = run_bench(args.scenario, args.target, verbose=args.verbose, learn=not args.cold,
+                            repeat=max(1, args.repeat))
+        print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
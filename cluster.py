@@ -0,0 +1,108 @@
+# ===============================================
+# cluster.py — 유사 제목 묶기 (SimHash) + 회차 간 반복 억제용 지문 인덱스
+# ===============================================
+import hashlib
+import re
+import time
+
+from keyword_matcher import normalize_text
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 2
+SIMILAR_MAX_DISTANCE = 14          # 해밍 거리 이하이면 같은 기사로 묶음 (한 회차 안)
+REPEAT_MAX_DISTANCE = 10           # 이전 회차 반복으로 뺄 거리 — 인덱스 전체(최대 2000개)와 비교하므로 더 엄격하게
+FINGERPRINT_TTL_HOURS = 24
+FINGERPRINT_MAX_ENTRIES = 2000
+
+_STRIP_RE = re.compile(r"[\W_]+", re.UNICODE)
+_hash_cache = {}
+
+def _shingle_hash(shingle):
+    h = _hash_cache.get(shingle)
+    if h is None:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        if len(_hash_cache) < 100000:
+            _hash_cache[shingle] = h
+    return h
+
+def shingles(title, size=SHINGLE_SIZE):
+    """정규화 제목(공백·문장부호 제거)의 글자 n-gram 집합"""
+    text = _STRIP_RE.sub("", normalize_text(title))
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def simhash(title):
+    """제목 → 64비트 SimHash 지문"""
+    weights = [0] * SIMHASH_BITS
+    for sh in shingles(title):
+        h = _shingle_hash(sh)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fp = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            fp |= 1 << bit
+    return fp
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+class FingerprintIndex:
+    """
+    최근 발송한 제목 지문 (fingerprint, epoch) 목록 — StateStore.fingerprints 에서 읽어 온다.
+    TTL / 용량 초과분은 오래된 것부터 버린다. scope = 프로필 (기본 프로필은 "").
+    """
+
+    def __init__(self, store, ttl_hours=FINGERPRINT_TTL_HOURS, max_entries=FINGERPRINT_MAX_ENTRIES, scope=""):
+        self.store = store
+        self.scope = scope
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def near(self, fp, max_distance=REPEAT_MAX_DISTANCE):
+        return any(hamming(fp, old) <= max_distance for old, _ in self.entries)
+
+    def add(self, fps, ts=None):
+        ts = ts or time.time()
+        fps = list(fps)
+        self.entries.extend((fp, ts) for fp in fps)
+        self.store.add_fingerprints(fps, ts, self.scope)
+        self.evict(ts)
+
+    def evict(self, now=None):
+        cutoff = (now or time.time()) - self.ttl
+        self.entries = [e for e in self.entries if e[1] >= cutoff][-self.max_entries:]
+        self.store.evict_fingerprints(cutoff, self.max_entries, self.scope)
+
+    def load(self):
+        cutoff = time.time() - self.ttl
+        self.entries = self.store.load_fingerprints(cutoff, self.scope)[-self.max_entries:]
+        return self
+
+def cluster_articles(articles, index=None, max_distance=SIMILAR_MAX_DISTANCE, repeat_distance=REPEAT_MAX_DISTANCE):
+    """
+    기사(dict, "title" 필수)를 들어온 순서대로 묶는다.
+    - 앞선 대표 기사와 지문 거리가 max_distance 이하이면 그 묶음에 합침
+    - index(최근 발송 지문)와 repeat_distance 이하인 기사는 이전 회차 반복으로 보고 따로 뺀다
+    반환: clusters, repeats
+    clusters[*] = {"article": 대표 기사, "members": [기사...], "fingerprints": [지문...]}
+    """
+    clusters, repeats = [], []
+    for a in articles:
+        fp = simhash(a["title"])
+        if index is not None and index.near(fp, repeat_distance):
+            repeats.append(a)
+            continue
+        for c in clusters:
+            if hamming(fp, c["fingerprints"][0]) <= max_distance:
+                c["members"].append(a)
+                c["fingerprints"].append(fp)
+                break
+        else:
+            clusters.append({"article": a, "members": [a], "fingerprints": [fp]})
+    return clusters, repeats
@@ -0,0 +1,90 @@
+# ===============================================
+# dedup.py — 발송 기사 중복 방지 인덱스 (정규화 URL / TTL + 용량 제한)
+# ===============================================
+import re
+import time
+import urllib.parse
+
+SENT_TTL_DAYS = 14
+SENT_MAX_ENTRIES = 5000
+
+# 추적용 파라미터 (정규화 시 제거)
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref", "from", "sns", "share", "cmpid", "ncid"}
+# 네이버 뉴스 기사 주소: /article/{언론사}/{기사번호} 또는 ?oid=..&aid=..
+_NAVER_ARTICLE_RE = re.compile(r"/article/(\d{3})/(\d+)")
+
+def canonical_url(url):
+    """
+    중복 판정용 URL 정규화:
+    - 스킴/호스트 소문자, http→https, www. 제거, fragment 제거
+    - 추적 파라미터(utm_* 등) 제거 후 쿼리 정렬, 끝 슬래시 제거
+    - 네이버 뉴스(n.news / m.sports / sports.news …)는 언론사·기사번호로 통일
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+
+    if host.endswith("naver.com"):
+        m = _NAVER_ARTICLE_RE.search(parts.path)
+        q = dict(query)
+        if m:
+            return f"naver:{m.group(1)}/{m.group(2)}"
+        if q.get("oid") and q.get("aid"):
+            return f"naver:{q['oid']}/{q['aid']}"
+
+    query = sorted(
+        (k, v) for k, v in query
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    port = f":{port}" if port and port not in (80, 443) else ""
+    return urllib.parse.urlunsplit(("https", host + port, path, urllib.parse.urlencode(query), ""))
+
+def article_keys(item):
+    """기사 하나의 중복 판정 키 (originallink / link 정규화, 중복 제거)"""
+    keys = []
+    for field in ("originallink", "link"):
+        key = canonical_url(item.get(field))
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+class SentIndex:
+    """
+    발송한 기사 키 인덱스 (StateStore.sent_links, 키가 PRIMARY KEY 라 조회는 인덱스 1회).
+    매번 저장소를 직접 조회하므로 다른 프로세스(force_send 등)가 추가한 기록도 바로 보인다.
+    만료/용량 정리는 오래된 것부터 지운다. scope = 프로필 (기본 프로필은 "").
+    """
+
+    def __init__(self, store, ttl_days=SENT_TTL_DAYS, max_entries=SENT_MAX_ENTRIES, scope=""):
+        self.store = store
+        self.scope = scope
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+
+    def __contains__(self, key):
+        return self.store.sent_seen([key], self.scope)
+
+    def __len__(self):
+        return self.store.sent_count(self.scope)
+
+    def seen(self, keys):
+        return self.store.sent_seen(keys, self.scope)
+
+    def add(self, keys, ts=None):
+        ts = ts or time.time()
+        self.store.add_sent(keys, ts, self.scope)
+        self.evict(ts)
+
+    def evict(self, now=None):
+        now = now or time.time()
+        self.store.evict_sent(now - self.ttl, self.max_entries, self.scope)
@@ -0,0 +1,155 @@
+# ===============================================
+# delivery.py — 텔레그램 발송 (4096자 분할 / chat별 속도 제한 / 429 재시도 / 병렬 발송)
+# ===============================================
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TELEGRAM_API = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+MAX_MESSAGE_CHARS = 4096
+CHAT_RATE_PER_SEC = 1.0      # chat_id 당 초당 메시지 수
+CHAT_BURST = 3               # 순간 허용량
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 60         # 429 retry_after 상한(초)
+
+def split_message(items, limit=MAX_MESSAGE_CHARS):
+    """
+    항목(기사 1건 = 여러 줄일 수 있음) 경계에서만 잘라 limit 이하 조각들로 나눈다.
+    항목 하나가 limit 를 넘으면 그 항목만 줄 단위 → 글자 단위로 자른다.
+    """
+    chunks, cur, cur_len = [], [], 0
+    for item in items:
+        pieces = [item] if len(item) <= limit else _split_long(item, limit)
+        for piece in pieces:
+            extra = len(piece) + (1 if cur else 0)
+            if cur and cur_len + extra > limit:
+                chunks.append("\n".join(cur))
+                cur, cur_len = [], 0
+                extra = len(piece)
+            cur.append(piece)
+            cur_len += extra
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+def _split_long(text, limit):
+    out, cur = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if cur:
+                out.append(cur)
+                cur = ""
+            out.append(line[:limit])
+            line = line[limit:]
+        if cur and len(cur) + 1 + len(line) > limit:
+            out.append(cur)
+            cur = line
+        else:
+            cur = f"{cur}\n{line}" if cur else line
+    if cur:
+        out.append(cur)
+    return out
+
+class TokenBucket:
+    """간단한 토큰 버킷 (스레드 안전). acquire() 는 토큰이 생길 때까지 기다린다."""
+
+    def __init__(self, rate=CHAT_RATE_PER_SEC, burst=CHAT_BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """429 retry_after 동안 토큰을 비워 같은 chat 의 다른 발송도 멈추게 한다"""
+        with self.lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def bucket_for(chat_id):
+    with _buckets_lock:
+        b = _buckets.get(chat_id)
+        if b is None:
+            b = _buckets[chat_id] = TokenBucket()
+        return b
+
+def send_chunk(session, token, chat_id, text, timeout):
+    """
+    조각 1개 발송. 429 면 retry_after 만큼 쉬고 재시도.
+    반환: {"ok", "status", "retries", "chars", "error"}
+    """
+    url = f"{TELEGRAM_API}/bot{token}/sendMessage"
+    payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML", "disable_web_page_preview": True}
+    bucket = bucket_for(chat_id)
+    result = {"ok": False, "status": None, "retries": 0, "chars": len(text), "error": None}
+    for attempt in range(MAX_RETRIES + 1):
+        result["retries"] = attempt
+        bucket.acquire()
+        try:
+            r = session.post(url, data=payload, timeout=timeout)
+        except Exception as e:
+            result["error"] = str(e)
+            print("❌ 텔레그램 전송 예외:", e)
+            continue
+        result["status"] = r.status_code
+        if r.status_code == 200:
+            result["ok"] = True
+            result["error"] = None
+            return result
+        if r.status_code == 429:
+            try:
+                retry_after = int(r.json().get("parameters", {}).get("retry_after", 1))
+            except Exception:
+                retry_after = 1
+            retry_after = min(max(retry_after, 1), MAX_RETRY_AFTER)
+            print(f"⏳ 텔레그램 429 → {retry_after}초 후 재시도")
+            bucket.pause(retry_after)
+            continue
+        result["error"] = r.text
+        print("❌ 텔레그램 응답:", r.status_code, r.text)
+        return result  # 4xx 등은 재시도해도 같은 결과
+    return result
+
+def deliver(session, token, jobs, timeout):
+    """
+    jobs = [(chat_id, items), ...] — items 는 줄/기사 단위 문자열 목록.
+    chat 별로 조각을 순서대로 보내고, 서로 다른 job 은 동시에 보낸다.
+    반환: jobs 와 같은 순서의 조각별 결과 목록 [[result, ...], ...]
+    """
+    if not jobs:
+        return []
+
+    def run(job):
+        chat_id, items = job
+        results = []
+        for chunk in split_message(items):
+            if results and not results[-1]["ok"]:
+                # 순서가 깨지지 않도록 실패 이후 조각은 보내지 않음
+                results.append({"ok": False, "status": None, "retries": 0, "chars": len(chunk), "error": "skipped"})
+                continue
+            results.append(send_chunk(session, token, chat_id, chunk, timeout))
+        return results
+
+    if len(jobs) == 1:
+        return [run(jobs[0])]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        return list(pool.map(run, jobs))
+
+def delivered(results):
+    """job 하나의 조각 결과가 모두 성공했는지"""
+    return bool(results) and all(r["ok"] for r in results)
@@ -0,0 +1,37 @@
+# ===============================================
+# digest.py — 집계 버킷으로 최근 N일 다이제스트 (네이버 / 원본 로그 없이, 관리자 명령)
+# ===============================================
+# 사용:
+#   python digest.py [--days 7] [--today] [--profile 이름] [--send]
+#   --today 면 오늘 지금까지 포함 (기본은 어제까지), --send 면 관리자 채널로 (기본은 화면 출력만)
+import argparse
+import sys
+
+from main import deliver_messages, digest_report, get_profiles, init_process, profile_label
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="집계 버킷 다이제스트")
+    parser.add_argument("--days", type=int, default=7, help="최근 며칠 (기본 7)")
+    parser.add_argument("--today", action="store_true", help="오늘 지금까지 포함")
+    parser.add_argument("--profile", help="프로필 이름 (기본: 전부)")
+    parser.add_argument("--send", action="store_true", help="관리자 채널로 발송")
+    args = parser.parse_args(argv)
+
+    init_process()
+    all_profiles = get_profiles()
+    profiles = [p for p in all_profiles if not args.profile or p["name"] == args.profile]
+    if not profiles:
+        print(f"❌ 프로필 없음: {args.profile}")
+        return 1
+    reports = [
+        (p, digest_report(p, max(1, args.days), include_today=args.today, label=profile_label(p, all_profiles)))
+        for p in profiles
+    ]
+    for _, lines in reports:
+        print("\n".join(lines))
+    if args.send:
+        deliver_messages([(p["admin_chat_id"], lines) for p, lines in reports])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
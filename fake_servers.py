@@ -0,0 +1,293 @@
+# ===============================================
+# fake_servers.py — 로컬 네이버 뉴스 검색 / 텔레그램 sendMessage 대역 서버
+# ===============================================
+# 단독 실행: python fake_servers.py --scenario match_day
+# main.py 를 이 서버로 붙이려면:
+#   NAVER_API_URL=http://127.0.0.1:8081/v1/search/news.json
+#   TELEGRAM_API_URL=http://127.0.0.1:8082
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from keyword_matcher import parse_weighted
+
+KST = timezone(timedelta(hours=9))
+
+# 시나리오: 시간당 기사 수 / 키워드 포함 비율 / 유사 제목 비율 / 지연(+꼬리 지연) / 오류 주입
+SCENARIOS = {
+    "quiet": {
+        "articles_per_hour": 3,
+        "match_ratio": 0.4,
+        "exclude_ratio": 0.05,
+        "near_dup_ratio": 0.0,
+        "latency_ms": 40,
+        "jitter_ms": 20,
+        "error_rate": 0.0,
+        "telegram_429_rate": 0.0,
+    },
+    "match_day": {
+        "articles_per_hour": 60,
+        "match_ratio": 0.7,
+        "exclude_ratio": 0.1,
+        "near_dup_ratio": 0.4,
+        "latency_ms": 80,
+        "jitter_ms": 60,
+        "error_rate": 0.0,
+        "telegram_429_rate": 0.1,
+    },
+    "api_errors": {
+        "articles_per_hour": 20,
+        "match_ratio": 0.5,
+        "exclude_ratio": 0.1,
+        "near_dup_ratio": 0.1,
+        "latency_ms": 200,
+        "jitter_ms": 300,
+        "error_rate": 0.3,
+        "error_status": 500,
+        "telegram_429_rate": 0.2,
+    },
+    "slow_tail": {
+        "articles_per_hour": 40,
+        "match_ratio": 0.6,
+        "exclude_ratio": 0.1,
+        "near_dup_ratio": 0.2,
+        "latency_ms": 80,
+        "jitter_ms": 40,
+        "tail_ratio": 0.04,      # 이 비율의 응답은 tail_ms 만큼 더 늦게 (헤지 / 읽기 마감 측정용)
+        "tail_ms": 4000,
+        "error_rate": 0.1,
+        "error_status": 503,
+        "telegram_429_rate": 0.0,
+    },
+    "outage": {                  # 네이버가 계속 실패 — 재시도 / 헤지가 모두 소진되는 경로
+        "articles_per_hour": 20,
+        "match_ratio": 0.5,
+        "exclude_ratio": 0.1,
+        "near_dup_ratio": 0.1,
+        "latency_ms": 40,
+        "jitter_ms": 20,
+        "error_rate": 1.0,
+        "error_status": 503,
+        "telegram_429_rate": 0.0,
+    },
+}
+
+_NEUTRAL = ["날씨", "증시", "부동산", "반도체", "교통", "축제", "국회", "환율", "여행", "교육"]
+_PHRASES = ["홈경기 승리", "원정 무승부", "3연승 질주", "감독 인터뷰", "선발 명단 발표",
+            "부상 복귀", "이적 협상", "팬 미팅 개최", "유소년 육성", "시즌 결산"]
+_PREFIXES = ["[K리그1] ", "[포토] ", "[속보] ", "", ""]
+
+def _read_lines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except OSError:
+        return []
+
+class NewsTimeline:
+    """시나리오에 맞춰 과거 window_hours 동안의 기사 목록(최신순)을 미리 만든다."""
+
+    def __init__(self, scenario, now=None, window_hours=48, seed=7,
+                 include_file="filter_keywords.txt", exclude_file="exclude_keywords.txt"):
+        self.scenario = scenario
+        rng = random.Random(seed)
+        include = [parse_weighted(line)[0] for line in _read_lines(include_file)] or ["안양"]
+        exclude = _read_lines(exclude_file) or ["정관장"]
+        now = now or datetime.now(KST)
+        rate = scenario["articles_per_hour"]
+        self.items = []
+        t = now
+        end = now - timedelta(hours=window_hours)
+        seq = 0
+        while True:
+            t -= timedelta(seconds=rng.expovariate(rate / 3600.0))
+            if t < end:
+                break
+            seq += 1
+            self.items.append(self._make_item(rng, seq, t, include, exclude))
+
+    def _make_item(self, rng, seq, pub, include, exclude):
+        sc = self.scenario
+        if self.items and rng.random() < sc.get("near_dup_ratio", 0):
+            # 직전 기사들 중 하나를 살짝 바꾼 유사 제목 (다른 언론사)
+            base = rng.choice(self.items[-5:])["_plain"]
+            plain = rng.choice(_PREFIXES) + base.replace("…", "...").replace(" ", "  ", 1)
+        elif rng.random() < sc.get("match_ratio", 0.5):
+            kw = rng.choice(include)
+            plain = f"{rng.choice(_PREFIXES)}{kw} {rng.choice(_PHRASES)}"
+            if rng.random() < sc.get("exclude_ratio", 0):
+                plain += f"… {rng.choice(exclude)}전"
+        else:
+            plain = f"{rng.choice(_NEUTRAL)} {rng.choice(_NEUTRAL)} 소식 {seq}"
+        press = rng.randint(1, 400)
+        return {
+            "_plain": plain,
+            "title": plain.replace("안양", "<b>안양</b>"),
+            "originallink": f"https://press{press}.example.com/news/articleView.html?idxno={seq}",
+            "link": f"https://n.news.naver.com/mnews/article/{press:03d}/{seq:010d}?sid=104",
+            "description": f"{plain} 관련 상세 내용입니다.",
+            "pubDate": format_datetime(pub.astimezone(KST)),
+        }
+
+    def page(self, start, display):
+        return [{k: v for k, v in it.items() if not k.startswith("_")}
+                for it in self.items[start - 1:start - 1 + display]]
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = 0
+            self.errors = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.messages = []
+
+    def add(self, bytes_in, bytes_out, error=False, message=None):
+        with self.lock:
+            self.calls += 1
+            self.errors += 1 if error else 0
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            if message is not None:
+                self.messages.append(message)
+
+    def snapshot(self):
+        with self.lock:
+            return {"calls": self.calls, "errors": self.errors,
+                    "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                    "messages": len(self.messages)}
+
+def _sleep_latency(scenario, rng, tail=False):
+    ms = scenario.get("latency_ms", 0) + rng.uniform(0, scenario.get("jitter_ms", 0))
+    if tail and rng.random() < scenario.get("tail_ratio", 0):
+        ms += scenario.get("tail_ms", 0)
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive 재사용 측정용
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, bytes_in=0, error=False, message=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.stats.add(bytes_in, len(data), error=error, message=message)
+
+class _NaverHandler(_Handler):
+    def do_GET(self):
+        server = self.server
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path != "/v1/search/news.json":
+            return self._reply(404, {"errorMessage": "not found"}, error=True)
+        if not self.headers.get("X-Naver-Client-Id"):
+            return self._reply(401, {"errorMessage": "missing client id", "errorCode": "024"}, error=True)
+        _sleep_latency(server.scenario, server.rng, tail=True)
+        if server.rng.random() < server.scenario.get("error_rate", 0):
+            status = server.scenario.get("error_status", 500)
+            return self._reply(status, {"errorMessage": "injected", "errorCode": "SE99"}, error=True)
+        q = urllib.parse.parse_qs(parsed.query)
+        display = min(int(q.get("display", ["10"])[0]), 100)
+        start = min(int(q.get("start", ["1"])[0]), 1000)
+        items = server.timeline.page(start, display)
+        body = {
+            "lastBuildDate": format_datetime(datetime.now(KST)),
+            "total": len(server.timeline.items),
+            "start": start,
+            "display": len(items),
+            "items": items,
+        }
+        self._reply(200, body)
+
+class _TelegramHandler(_Handler):
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if not self.path.endswith("/sendMessage"):
+            return self._reply(404, {"ok": False, "description": "Not Found"}, bytes_in=len(raw), error=True)
+        _sleep_latency(server.scenario, server.rng)
+        if server.rng.random() < server.scenario.get("telegram_429_rate", 0):
+            return self._reply(429, {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                     "parameters": {"retry_after": 1}}, bytes_in=len(raw), error=True)
+        form = urllib.parse.parse_qs(raw.decode("utf-8"))
+        text = form.get("text", [""])[0]
+        if len(text) > 4096:
+            return self._reply(400, {"ok": False, "description": "Bad Request: message is too long"},
+                               bytes_in=len(raw), error=True)
+        message = {"chat_id": form.get("chat_id", [""])[0], "text": text}
+        self._reply(200, {"ok": True, "result": {"message_id": server.stats.calls + 1}},
+                    bytes_in=len(raw), message=message)
+
+class FakeServers:
+    """네이버 / 텔레그램 대역 서버 한 쌍 (백그라운드 스레드)."""
+
+    def __init__(self, scenario="quiet", host="127.0.0.1", naver_port=0, telegram_port=0, seed=7):
+        self.naver = ThreadingHTTPServer((host, naver_port), _NaverHandler)
+        self.telegram = ThreadingHTTPServer((host, telegram_port), _TelegramHandler)
+        for srv in (self.naver, self.telegram):
+            srv.daemon_threads = True
+            srv.stats = Stats()
+        self.seed = seed
+        self.use(scenario)
+        self._threads = [threading.Thread(target=s.serve_forever, daemon=True) for s in (self.naver, self.telegram)]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def naver_url(self):
+        return f"http://{self.naver.server_address[0]}:{self.naver.server_address[1]}/v1/search/news.json"
+
+    @property
+    def telegram_url(self):
+        return f"http://{self.telegram.server_address[0]}:{self.telegram.server_address[1]}"
+
+    def use(self, scenario, now=None):
+        """시나리오 교체 + 기사 목록 재생성 + 통계 초기화"""
+        sc = SCENARIOS[scenario] if isinstance(scenario, str) else scenario
+        for srv in (self.naver, self.telegram):
+            srv.scenario = sc
+            srv.rng = random.Random(self.seed)
+            srv.stats.reset()
+        self.naver.timeline = NewsTimeline(sc, now=now, seed=self.seed)
+
+    def stats(self):
+        return {"naver": self.naver.stats.snapshot(), "telegram": self.telegram.stats.snapshot()}
+
+    def shutdown(self):
+        for srv in (self.naver, self.telegram):
+            srv.shutdown()
+            srv.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fcanews 로컬 대역 서버")
+    parser.add_argument("--scenario", default="quiet", choices=sorted(SCENARIOS))
+    parser.add_argument("--naver-port", type=int, default=8081)
+    parser.add_argument("--telegram-port", type=int, default=8082)
+    args = parser.parse_args()
+
+    servers = FakeServers(args.scenario, naver_port=args.naver_port, telegram_port=args.telegram_port)
+    print(f"🧪 대역 서버 실행 ({args.scenario})")
+    print(f"   NAVER_API_URL={servers.naver_url}")
+    print(f"   TELEGRAM_API_URL={servers.telegram_url}")
+    try:
+        while True:
+            time.sleep(60)
+            print("📊", servers.stats())
+    except KeyboardInterrupt:
+        servers.shutdown()
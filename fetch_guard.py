@@ -0,0 +1,193 @@
+# ===============================================
+# fetch_guard.py — 네이버 호출 보호: 재시도(지터 지수 백오프) / 헤지 요청 / 서킷 브레이커 / 실행 마감
+# ===============================================
+# guarded_call(send, ...) 가 페이지 요청 1건의 모든 판단을 맡고, 판단 내역(info)을 돌려준다:
+#   {"attempts", "retries", "hedged", "hedge_won", "status", "error", "ms"}
+# - 연결 타임아웃은 짧게, 읽기는 별도 상한 + 실행 마감까지 남은 시간 중 작은 값
+# - 최근 응답 시간의 p95 를 넘도록 응답이 없으면 같은 요청을 한 번 더 보내고(헤지) 먼저 온 성공을 쓴다
+# - 연결 오류 / 타임아웃 / 429·5xx 만 재시도 (그 밖의 4xx 는 바로 실패), 429 는 Retry-After 존중
+# - 재시도 대상 실패가 BREAKER_THRESHOLD 번 연속이면 BREAKER_COOLDOWN 동안 요청 차단 (저장소에 기록 → 다음 실행도 공유),
+#   쿨다운 뒤 첫 요청이 성공하면 복구, 실패하면 다시 차단
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+RETRY_ATTEMPTS = 3            # 첫 시도 포함
+BACKOFF_BASE = 0.25           # 초, attempt 마다 2배 (full jitter: 0 ~ 상한 균등)
+BACKOFF_CAP = 2.0
+RETRY_AFTER_CAP = 5.0         # 429 Retry-After 를 따를 최대 초
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20        # 표본이 이보다 적으면 HEDGE_DEFAULT_DELAY
+HEDGE_DEFAULT_DELAY = 1.5
+HEDGE_MIN_DELAY = 0.2
+LATENCY_WINDOW = 200          # 헤지 기준 계산에 쓰는 최근 성공 응답 수
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 300        # 초
+
+class FetchFailed(Exception):
+    """요청이 끝내 실패 (info = guarded_call 판단 내역)"""
+
+    def __init__(self, info):
+        super().__init__(info.get("error"))
+        self.info = info
+
+def backoff_delay(attempt, rng=random):
+    """attempt(0부터)번째 실패 뒤 대기 초 — full jitter"""
+    return rng.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+class LatencyTracker:
+    """최근 성공 응답 시간(초) → 헤지 대기 시간"""
+
+    def __init__(self, samples=()):
+        self.lock = threading.Lock()
+        self.samples = deque(samples, maxlen=LATENCY_WINDOW)
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def hedge_delay(self):
+        with self.lock:
+            values = sorted(self.samples)
+        if len(values) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, values[min(len(values) - 1, int(HEDGE_QUANTILE * len(values)))])
+
+class CircuitBreaker:
+    """연속 실패 수 / 차단 시각을 StateStore kv 에 JSON 으로 (프로세스 간 공유)"""
+
+    def __init__(self, store, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.store = store
+        self.key = f"breaker|{name}"
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        try:
+            data = json.loads(store.get(self.key) or "{}")
+        except ValueError:
+            data = {}
+        self.failures = data.get("failures", 0)
+        self.opened_at = data.get("opened_at")
+
+    def _save(self):
+        try:
+            self.store.set(self.key, json.dumps({"failures": self.failures, "opened_at": self.opened_at}))
+        except Exception as e:
+            print("⚠️ 서킷 브레이커 기록 예외:", e)
+
+    def state(self):
+        """closed / open / half_open(쿨다운이 지나 시험 요청 허용)"""
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.time() - self.opened_at >= self.cooldown else "open"
+
+    def success(self):
+        with self.lock:
+            if self.failures or self.opened_at is not None:
+                if self.opened_at is not None:
+                    print("🟢 네이버 서킷 브레이커 복구")
+                self.failures, self.opened_at = 0, None
+                self._save()
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            half_open = self.opened_at is not None and time.time() - self.opened_at >= self.cooldown
+            if self.failures >= self.threshold or half_open:
+                if self.opened_at is None or half_open:
+                    print(f"🔴 네이버 연속 실패 {self.failures}회 → {self.cooldown}초 동안 요청 차단")
+                self.opened_at = time.time()
+            self._save()
+
+def _hedged(send, timeout, hedge_delay, wait_limit, info):
+    """
+    send(timeout) 한 번 (+ hedge_delay 안에 응답이 없으면 한 번 더). 먼저 온 성공(200)을 쓰고,
+    둘 다 실패면 나중 결과. 반환: (response 또는 None, 예외 또는 None)
+    """
+    deadline = time.monotonic() + wait_limit
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = [pool.submit(send, timeout, False)]
+        if hedge_delay is not None and hedge_delay < wait_limit:
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                futures.append(pool.submit(send, timeout, True))
+                info["hedged"] += 1
+        pending = set(futures)
+        r, err = None, TimeoutError("실행 마감까지 응답 없음")
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for f in done:
+                try:
+                    r, err = f.result(), None
+                except Exception as e:
+                    r, err = None, e
+                    continue
+                if r.status_code == 200:
+                    info["hedge_won"] = len(futures) > 1 and f is futures[1]
+                    return r, None
+        return r, err
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)   # 진 쪽 / 마감 넘긴 요청은 기다리지 않는다
+
+def guarded_call(send, breaker, tracker, connect_timeout, read_timeout, deadline_at=None, hedge=True):
+    """
+    send(timeout, hedge) → requests.Response 를 보호해서 부른다.
+    deadline_at: time.monotonic() 기준 실행 마감 (None 이면 타임아웃만)
+    반환: (200 response, info) / 실패하면 FetchFailed(info)
+    """
+    info = {"attempts": 0, "retries": 0, "hedged": 0, "hedge_won": False, "status": None, "error": None, "ms": 0.0}
+    t0 = time.perf_counter()
+
+    def fail(error):
+        info["error"] = error
+        info["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        raise FetchFailed(info)
+
+    for attempt in range(RETRY_ATTEMPTS):
+        if breaker is not None and breaker.state() == "open":
+            fail("서킷 차단 중")
+        remaining = deadline_at - time.monotonic() if deadline_at is not None else read_timeout + connect_timeout
+        if remaining <= 0:
+            fail("실행 마감")
+        info["attempts"] += 1
+        timeout = (connect_timeout, min(read_timeout, remaining))
+        started = time.perf_counter()
+        r, err = _hedged(send, timeout, tracker.hedge_delay() if hedge else None, remaining, info)
+        if r is not None:
+            info["status"] = r.status_code
+        if r is not None and r.status_code == 200:
+            tracker.add(time.perf_counter() - started)
+            if breaker is not None:
+                breaker.success()
+            info["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            return r, info
+
+        error = str(err) if err is not None else f"{r.status_code} {r.text[:200]}"
+        if r is not None and r.status_code not in RETRY_STATUSES:
+            fail(error)   # 요청 자체가 잘못됨 (인증 / 파라미터) — 재시도해도 같다
+        if breaker is not None:
+            breaker.failure()
+            if breaker.state() == "open":
+                fail(f"{error} (서킷 차단)")
+        if attempt == RETRY_ATTEMPTS - 1:
+            fail(error)
+        delay = backoff_delay(attempt)
+        if r is not None and r.status_code == 429:
+            try:
+                delay = max(delay, min(RETRY_AFTER_CAP, float(r.headers.get("Retry-After", 0))))
+            except ValueError:
+                pass
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            fail(f"{error} (재시도 전 실행 마감)")
+        print(f"🔁 네이버 요청 재시도 {attempt + 1}/{RETRY_ATTEMPTS - 1} ({delay:.2f}초 뒤): {error}")
+        time.sleep(delay)
+        info["retries"] += 1
+    fail("재시도 소진")
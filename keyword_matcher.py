@@ -0,0 +1,125 @@
+# ===============================================
+# keyword_matcher.py — 포함/제외 키워드 다중 패턴 매칭 (Aho-Corasick)
+# ===============================================
+import os
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+INCLUDE = "include"
+EXCLUDE = "exclude"
+
+_WS_RE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """
+    매칭용 정규화:
+    - NFKC (한글 자모 결합 / 전각 문자 → 반각)
+    - 소문자화
+    - 연속 공백 → 공백 1개, 앞뒤 공백 제거
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WS_RE.sub(" ", text.lower()).strip()
+
+class KeywordMatcher:
+    """
+    포함/제외 키워드를 하나의 오토마톤으로 컴파일해 두고,
+    제목을 한 번만 훑어서 포함·제외 히트 키워드를 모두 찾는다.
+    """
+
+    def __init__(self, include_keywords, exclude_keywords):
+        self.include_keywords = list(include_keywords or [])
+        self.exclude_keywords = list(exclude_keywords or [])
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for kind, keywords in ((INCLUDE, self.include_keywords), (EXCLUDE, self.exclude_keywords)):
+            for kw in keywords:
+                norm = normalize_text(kw)
+                if norm:
+                    self._add(norm, (kind, kw))
+        self._build()
+
+    def _add(self, pattern, tag):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (tag,)
+
+    def _build(self):
+        # BFS 로 실패 링크 계산, 출력은 실패 링크를 따라 미리 합쳐 둔다
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def match(self, text):
+        """
+        반환: (include_hits, exclude_hits) — 원본 키워드, 처음 등장 순서, 중복 없음
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        include_hits, exclude_hits = [], []
+        seen = set()
+        node = 0
+        for ch in normalize_text(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for tag in out[node]:
+                if tag not in seen:
+                    seen.add(tag)
+                    (include_hits if tag[0] == INCLUDE else exclude_hits).append(tag[1])
+        return include_hits, exclude_hits
+
+@lru_cache(maxsize=16)
+def _compile_cached(include_keywords, exclude_keywords):
+    return KeywordMatcher(include_keywords, exclude_keywords)
+
+def compile_matcher(include_keywords, exclude_keywords):
+    """키워드 목록 → 컴파일된 매처 (같은 목록이면 재사용). 포함 키워드 줄의 "| 가중치" 는 떼고 매칭"""
+    include = tuple(parse_weighted(k)[0] for k in include_keywords or ())
+    return _compile_cached(tuple(k for k in include if k), tuple(exclude_keywords or ()))
+
+def load_keywords(file_path):
+    if not os.path.exists(file_path):
+        print(f"⚠️ 키워드 파일 없음: {file_path}")
+        return []
+    with open(file_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def parse_weighted(line):
+    """
+    포함 필터 줄 "키워드 | 가중치" → (키워드, 가중치).
+    가중치가 없거나 숫자가 아니면 줄 전체가 키워드, 가중치 1.0
+    """
+    keyword, sep, weight = line.rpartition("|")
+    if sep:
+        try:
+            return keyword.strip(), float(weight)
+        except ValueError:
+            pass
+    return line, 1.0
+
+def load_weighted_keywords(file_path):
+    """포함 필터 파일 → {키워드: 가중치} (파일 순서 유지)"""
+    weights = {}
+    for line in load_keywords(file_path):
+        keyword, weight = parse_weighted(line)
+        if keyword:
+            weights[keyword] = weight
+    return weights
@@ -1,336 +1,1283 @@
 # ===============================================
 # main.py — fcanews 자동 발송 (짝수시 정시 / /data 기록 유지 / 관리자 리포트)
 # ===============================================
+# 시작 비용: requests / dotenv / 본문 가져오기 모듈은 처음 쓸 때 import 한다 (재개 / 스크립트 실행이 가볍게).
+# import 시점 부작용은 .env 읽기(있을 때만)뿐 — stdout 설정은 init_process(), 폴더 생성은 ensure_mount()
 import os
 import sys
-import requests
 import urllib.parse
-from dotenv import load_dotenv
+import heapq
 import html
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from email.utils import parsedate_to_datetime
+
+from aggregate import Aggregates, day_start, digest_lines
+from archive import ArchiveWriter
+from cluster import FingerprintIndex, cluster_articles
+from dedup import SentIndex, canonical_url
+from fetch_guard import CircuitBreaker, FetchFailed, LatencyTracker, guarded_call
+from delivery import deliver, delivered
+from keyword_matcher import compile_matcher, load_keywords, load_weighted_keywords
+from metrics import (
+    CallCounter,
+    RunMetrics,
+    append_jsonl,
+    HISTORY_RUNS,
+    format_percentiles,
+    phase_percentiles,
+    write_prometheus,
+)
+from pipeline import (
+    STATUS_DUPLICATE,
+    STATUS_EXCLUDE_HIT,
+    STATUS_INCLUDE_FAIL,
+    STATUS_PASSED,
+    STATUS_STALE,
+    PageCounters,
+    PageEnd,
+    classify_stages,
+    classify_title,
+    collect,
+    compose,
+    iter_pages,
+    normalize,
+    replay_pages,
+    stop_at,
+)
+from planner import DISPLAY_MAX, ArrivalModel, make_plan
+from scheduler import HEARTBEAT_STALE, CronSchedule, ProcessLock, Scheduler, make_job
+from snapshot import load_snapshot
+from scoring import Scorer, score_stage, select_top
+from profiles import DEFAULT_PROFILE_NAME, group_by_query, load_profiles, make_profile, scoped_key
+from state_store import StateStore, migrate_legacy
 
 # ─────────────────────────────────────────────
 # 환경 / 기본 설정
 # ─────────────────────────────────────────────
-try:
-    sys.stdout.reconfigure(line_buffering=True)
-except Exception:
-    pass
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+def load_env():
+    """.env 가 있을 때만 python-dotenv 로 읽는다 (Render 처럼 환경변수로만 주면 import 도 안 함)"""
+    if os.path.exists(ENV_FILE):
+        from dotenv import load_dotenv
+        load_dotenv(ENV_FILE)
+
+def init_process():
+    """실행 진입점(상주 / 스크립트)에서 한 번: 로그가 바로 보이도록 stdout 줄 단위 버퍼"""
+    try:
+        sys.stdout.reconfigure(line_buffering=True)
+    except Exception:
+        pass
 
-load_dotenv()
+load_env()
 CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
 CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID")
 
+NAVER_API_URL = os.getenv("NAVER_API_URL", "https://openapi.naver.com/v1/search/news.json")
+
 PERSISTENT_MOUNT = os.getenv("PERSISTENT_MOUNT", "/data")
-os.makedirs(PERSISTENT_MOUNT, exist_ok=True)
 
 SEARCH_KEYWORDS_FILE = "search_keywords.txt"
 FILTER_KEYWORDS_FILE = "filter_keywords.txt"     # 포함(통과) 필터
 EXCLUDE_KEYWORDS_FILE = "exclude_keywords.txt"   # 제외 필터
+OUTLET_WEIGHTS_FILE = "outlet_weights.txt"       # 언론사 가중치 (관련도 점수, 없으면 모두 1)
+PROFILES_FILE = os.getenv("PROFILES_FILE", "profiles.json")   # 없으면 위 파일 + TELEGRAM_CHAT_ID 하나로 동작
+SEARCH_MODE = os.getenv("SEARCH_MODE", "and")    # and: 검색어를 한 쿼리로 / or: 검색어 줄마다 따로 조회해 병합
+STATE_DB_FILE = os.path.join(PERSISTENT_MOUNT, "fcanews.db")       # watermark / 발송 기록 / 실행 기록 / 카운터
+METRICS_FILE = os.path.join(PERSISTENT_MOUNT, "metrics.jsonl")       # 실행별 단계 기록 (롤링, 내보내기용)
+METRICS_PROM_FILE = os.path.join(PERSISTENT_MOUNT, "metrics.prom")   # Prometheus textfile
+# 이전 버전 상태 파일 — 저장소 첫 생성 시 한 번 읽어서 이전(migrate)
 LAST_SENT_FILE = os.path.join(PERSISTENT_MOUNT, "last_sent_time.txt")
 LAST_CHECKED_FILE = os.path.join(PERSISTENT_MOUNT, "last_checked_time.txt")
-LOCK_FILE = "/tmp/fcanews.lock"
+SENT_LOG_FILE = os.path.join(PERSISTENT_MOUNT, "sent_log.json")
+CALL_COUNT_FILE = os.path.join(PERSISTENT_MOUNT, "call_count.json")
+SENT_LOG_SEED_FILE = "sent_log.json"             # 저장소 기본 발송 기록(링크 목록)
+TITLE_FINGERPRINT_FILE = os.path.join(PERSISTENT_MOUNT, "title_fingerprints.json")
+KEYWORD_SNAPSHOT_FILE = os.path.join(PERSISTENT_MOUNT, "keyword_snapshot.pickle")   # 키워드 파일 읽기·컴파일 결과 (mtime 으로 무효화)
+RECORD_DIR = os.getenv("RECORD_DIR", "")   # 지정하면 네이버 원본 응답 / 발송 기록을 날짜별 gzip JSONL 로 보관 (backtest.py)
+LOCK_FILE = "/tmp/fcanews.lock"   # 상주 프로세스 fcntl 락 (+ pid / 하트비트)
 
-DISPLAY_PER_CALL = 30
+DISPLAY_PER_CALL = 30     # 계획 없이 직접 부를 때의 기본값 (보통은 planner 가 10~100 에서 고름)
 MAX_LOOPS = 5
-REQUEST_TIMEOUT = 30
+NAVER_CALL_BUDGET = int(os.getenv("NAVER_CALL_BUDGET", "1000"))   # 하루 호출 예산 (API 한도와 별도)
+PREFETCH_RESERVE = 50     # 미리 받기는 예산을 이만큼 남겨 두고 멈춤 (정시 발송 몫)
+PREFETCH_PAGES = 2        # 현재 페이지 포함 동시에 요청해 두는 페이지 수
+REQUEST_TIMEOUT = 30      # 텔레그램
+NAVER_CONNECT_TIMEOUT = 3
+NAVER_READ_TIMEOUT = 10   # 요청 1회 읽기 상한 (실행 마감까지 남은 시간이 더 짧으면 그쪽)
+RUN_DEADLINE = int(os.getenv("RUN_DEADLINE", "120"))   # 실행 1회(begin_run 부터) 네이버 조회 마감(초)
+BODY_FETCH = os.getenv("BODY_FETCH", "0") == "1"   # 제목·요약으로 포함 필터를 못 넘은 기사를 본문(originallink)으로 재확인
+BODY_FETCH_DEADLINE = float(os.getenv("BODY_FETCH_DEADLINE", "10"))   # 실행당 본문 가져오기 마감(초)
+BODY_FETCH_MAX = 30       # 실행당 본문 요청 상한 (캐시 히트 제외)
+BODY_FETCH_PER_HOST = 2   # 언론사 호스트별 동시 요청
 MIN_SEND_THRESHOLD = 3
+TOP_K = int(os.getenv("TOP_K", "15"))   # 본 채널 최대 묶음 수 (점수 상위, 0 = 제한 없음) — 나머지는 관리자 리포트
+# 예약 실행 (cron 식: 분 시 일 월 요일, KST) — 빈 값이면 그 작업은 끔
+SEND_CRON = os.getenv("SEND_CRON", "0 */2 * * *")                  # 짝수시 정시 발송
+PREFETCH_CRON = os.getenv("PREFETCH_CRON", "50-58 1-23/2 * * *")   # 발송 10분 전부터 1분 간격 미리 받기
+PREVIEW_CRON = os.getenv("PREVIEW_CRON", "")
+FORCE_SEND_CRON = os.getenv("FORCE_SEND_CRON", "")
+DIGEST_CRON = os.getenv("DIGEST_CRON", "5 0 * * *")   # 전날 집계 다이제스트 → 관리자 채널
+MISFIRE_GRACE = int(os.getenv("MISFIRE_GRACE", "1800"))   # 예정 시각을 이 초만큼 넘겨 깨도 발송 (재개 / 재시작)
+PREFETCH_GRACE = 30       # 미리 받기는 늦으면 건너뜀
+DIGEST_GRACE = 6 * 3600   # 다이제스트는 늦어도 보낸다
+JOB_KINDS = {"send": "run_bot", "force_send": "force_send", "preview": "preview"}   # 작업 → 실행 기록 kind
 UA = "Mozilla/5.0 (compatible; fcanewsbot/3.0; +https://t.me/)"
 KST = timezone(timedelta(hours=9))
 FORCE_HOURS = {0, 8, 10, 12, 14, 16, 18, 20, 22}
 
 # ─────────────────────────────────────────────
-# 락 파일 관리
+# 상태 저장소 (SQLite WAL, 첫 실행 시 기존 파일 이전)
 # ─────────────────────────────────────────────
-def already_running():
-    if os.path.exists(LOCK_FILE):
-        mtime = os.path.getmtime(LOCK_FILE)
-        if (time.time() - mtime) < 600:
-            print("⚠️ 이미 실행 중인 프로세스 감지 → 종료")
-            return True
-    with open(LOCK_FILE, "w") as f:
-        f.write(datetime.now().isoformat())
-    return False
+_store = None
+_init_lock = threading.RLock()   # get_* 지연 초기화 (fetch_shared 작업 스레드에서도 처음 불릴 수 있다)
 
-def clear_lock():
-    try:
-        if os.path.exists(LOCK_FILE):
-            os.remove(LOCK_FILE)
-    except Exception as e:
-        print("⚠️ 락 파일 제거 예외:", e)
+def ensure_mount():
+    os.makedirs(PERSISTENT_MOUNT, exist_ok=True)
+
+def get_store():
+    global _store
+    if _store is not None:
+        return _store
+    with _init_lock:
+        if _store is not None:
+            return _store
+        ensure_mount()
+        store = StateStore(STATE_DB_FILE)
+        try:
+            migrate_legacy(
+                store,
+                last_sent_file=LAST_SENT_FILE,
+                last_checked_file=LAST_CHECKED_FILE,
+                sent_log_files=(SENT_LOG_FILE, SENT_LOG_SEED_FILE),
+                fingerprint_file=TITLE_FINGERPRINT_FILE,
+                call_count_file=CALL_COUNT_FILE,
+                metrics_file=METRICS_FILE,
+                canonical=canonical_url,
+            )
+        except Exception as e:
+            print("⚠️ 상태 파일 이전 예외:", e)
+        _store = store  # 이전까지 끝난 뒤에 공개
+    return _store
 
 # ─────────────────────────────────────────────
-# 시간 기록 (기사 기준)
+# 프로필 (키워드 파일 / 채널 / 발송 조건)
 # ─────────────────────────────────────────────
-def get_last_checked_time():
-    if not os.path.exists(LAST_CHECKED_FILE):
-        return None
+def default_profile():
+    """profiles.json 이 없을 때의 단일 프로필 (기존 설정 그대로)"""
+    return make_profile(
+        DEFAULT_PROFILE_NAME, SEARCH_KEYWORDS_FILE, FILTER_KEYWORDS_FILE, EXCLUDE_KEYWORDS_FILE,
+        TELEGRAM_CHAT_ID, ADMIN_CHAT_ID, MIN_SEND_THRESHOLD, FORCE_HOURS, SEARCH_MODE,
+        top_k=TOP_K, outlet_weights_file=OUTLET_WEIGHTS_FILE,
+    )
+
+_keyword_snapshot = None
+
+def get_keyword_snapshot(profiles, rec=None):
+    """
+    프로필들이 쓰는 키워드 목록 / 가중치 / 컴파일된 매처 (snapshot.py).
+    프로세스 메모리 → KEYWORD_SNAPSHOT_FILE → 원본에서 새로 만들기 순 — 원본 파일이 바뀌면 즉시 다시 만든다.
+    rec(계측 기록)을 주면 출처를 남긴다
+    """
+    global _keyword_snapshot
+    ensure_mount()
+    _keyword_snapshot, source = load_snapshot(KEYWORD_SNAPSHOT_FILE, profiles, _keyword_snapshot)
+    if rec is not None:
+        rec["source"] = source
+    return _keyword_snapshot
+
+def get_profiles():
+    """실행마다 다시 읽는다 (파일 수정 즉시 반영)"""
+    return load_profiles(PROFILES_FILE, default_profile())
+
+def profile_label(profile, profiles):
+    """리포트 머리글용 프로필 이름 (프로필이 하나뿐이면 None)"""
+    return profile["name"] if len(profiles) > 1 else None
+
+def _scope(profile):
+    return profile["scope"] if profile else ""
+
+# ─────────────────────────────────────────────
+# 시간 기록 (기사 기준) — profile 을 주지 않으면 기본 프로필
+# ─────────────────────────────────────────────
+def get_last_checked_time(profile=None):
     try:
-        with open(LAST_CHECKED_FILE, "r") as f:
-            return datetime.fromisoformat(f.read().strip())
+        return get_store().get_time(scoped_key("last_checked", profile))
     except Exception:
         return None
 
-def mark_checked_time(latest_pub):
+def mark_checked_time(latest_pub, profile=None):
     try:
-        with open(LAST_CHECKED_FILE, "w") as f:
-            f.write(latest_pub.isoformat())
-        print(f"🕓 최신 기사 시각 갱신: {latest_pub.strftime('%Y-%m-%d %H:%M:%S')}")
+        get_store().set_time(scoped_key("last_checked", profile), latest_pub)
+        label = f"[{profile['name']}] " if profile and profile["scope"] else ""
+        print(f"🕓 {label}최신 기사 시각 갱신: {latest_pub.strftime('%Y-%m-%d %H:%M:%S')}")
     except Exception as e:
         print("⚠️ 시간 기록 예외:", e)
 
 # ─────────────────────────────────────────────
 # 발송 기록 (중복 방지)
 # ─────────────────────────────────────────────
-def already_sent_this_hour():
-    if not os.path.exists(LAST_SENT_FILE):
-        return False
+def already_sent_this_hour(profile=None, now=None):
+    """now(예정 발송 시각, 없으면 지금)과 같은 시에 이미 보냈으면 True — 늦게 깬 실행도 예정 시각의 시로 본다"""
     try:
-        with open(LAST_SENT_FILE, "r") as f:
-            last_sent = datetime.fromisoformat(f.read().strip())
+        last_sent = get_store().get_time(scoped_key("last_sent", profile))
     except Exception:
         return False
-    now = datetime.now(KST)
+    if last_sent is None:
+        return False
+    now = (now or datetime.now(KST)).astimezone(KST)
     return last_sent.astimezone(KST).strftime("%Y-%m-%d %H") == now.strftime("%Y-%m-%d %H")
 
-def mark_sent_now():
-    now = datetime.now(KST)
-    with open(LAST_SENT_FILE, "w") as f:
-        f.write(now.isoformat())
+def mark_sent_now(profile=None):
+    get_store().set_time(scoped_key("last_sent", profile), datetime.now(KST))
+
+def clear_sent_mark(profile=None):
+    """이번 시각 발송 기록 지우기 (test_run 등 수동 재실행용)"""
+    get_store().set(scoped_key("last_sent", profile), "")
+
+def get_sent_index(profile=None):
+    """발송 링크 인덱스 (저장소 직접 조회)"""
+    return SentIndex(get_store(), scope=_scope(profile))
+
+def get_fingerprint_index(profile=None):
+    """최근 발송 제목 지문 인덱스 (호출 시점의 저장소 내용으로 로드)"""
+    return FingerprintIndex(get_store(), scope=_scope(profile)).load()
+
+def mark_sent_articles(articles, clusters=(), profile=None):
+    """
+    발송된 기사의 링크(최종 통과 전부)와 묶음 지문을 한 트랜잭션으로 저장
+    """
+    with get_store().transaction():
+        index = get_sent_index(profile)
+        for a in articles:
+            if a["status"] == STATUS_PASSED:
+                index.add(a["keys"])
+        if clusters:
+            get_fingerprint_index(profile).add([fp for c in clusters for fp in c["fingerprints"]])
 
 # ─────────────────────────────────────────────
-# 파일 로드
+# 계측 (단계별 소요 / 네이버 일일 호출 수)
 # ─────────────────────────────────────────────
-def load_keywords(file_path):
-    if not os.path.exists(file_path):
-        print(f"⚠️ 키워드 파일 없음: {file_path}")
-        return []
-    with open(file_path, "r", encoding="utf-8") as f:
-        return [line.strip() for line in f if line.strip()]
+REPORT_PHASES = ["naver_call", "parse", "filter", "send", "state_write"]
+
+run_metrics = RunMetrics("idle")
+_call_counter = None
+
+def get_call_counter():
+    global _call_counter
+    if _call_counter is None:
+        with _init_lock:
+            if _call_counter is None:
+                _call_counter = CallCounter(get_store())
+    return _call_counter
+
+_deadline_at = None
+
+def begin_run(kind):
+    """새 실행 계측 시작 (이후 네이버 호출/단계 기록은 여기에 쌓인다) + 조회 마감(RUN_DEADLINE) 시작"""
+    global run_metrics, _deadline_at
+    run_metrics = RunMetrics(kind)
+    _deadline_at = time.monotonic() + RUN_DEADLINE
+    return run_metrics
+
+def finish_run():
+    """호출 수 + 실행 기록 저장 (1회만), JSONL 추가, Prometheus 파일 갱신, 응답 보관분 쓰기"""
+    if run_metrics.finished:
+        return
+    run_metrics.finished = True
+    flush_recorder()
+    try:
+        store = get_store()
+        counter = get_call_counter()
+        with store.transaction():
+            counter.flush()
+            run = run_metrics.to_dict()
+            run["naver_calls_today"] = counter.today()
+            store.add_run(run)
+        append_jsonl(METRICS_FILE, run)
+        write_prometheus(METRICS_PROM_FILE, run, counter, phase_percentiles(store.recent_runs(HISTORY_RUNS)))
+    except Exception as e:
+        print("⚠️ 계측 기록 예외:", e)
+
+# ─────────────────────────────────────────────
+# 원본 응답 보관 (RECORD_DIR 지정 시) — 실행 끝(finish_run)에 한 번에 덧붙인다
+# ─────────────────────────────────────────────
+_recorder = None
+
+def get_recorder():
+    global _recorder
+    if _recorder is None and RECORD_DIR:
+        with _init_lock:
+            if _recorder is None:
+                try:
+                    _recorder = ArchiveWriter(RECORD_DIR)
+                except Exception as e:
+                    print("⚠️ 응답 보관 폴더 예외:", e)
+    return _recorder
+
+def flush_recorder():
+    if _recorder is None:
+        return
+    try:
+        _recorder.flush()
+    except Exception as e:
+        print("⚠️ 응답 보관 기록 예외:", e)
+
+def stats_report_lines():
+    """관리자 리포트용: 최근 실행 단계별 p50/p95 + 오늘 네이버 호출 수"""
+    lines = []
+    try:
+        timings = format_percentiles(phase_percentiles(get_store().recent_runs(HISTORY_RUNS)), REPORT_PHASES)
+    except Exception:
+        timings = ""
+    if timings:
+        lines.append(f"(소요 p50/p95) {timings}")
+    counter = get_call_counter()
+    lines.append(f"(호출) 오늘 {counter.today()}/{counter.quota}")
+    return lines
+
+# ─────────────────────────────────────────────
+# HTTP 세션 (연결 재사용)
+# ─────────────────────────────────────────────
+_session = None
+
+def get_session():
+    """프로세스 전체에서 공유하는 requests 세션 (keep-alive / 커넥션 풀)"""
+    global _session
+    if _session is None:
+        with _init_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, PREFETCH_PAGES * 2))
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
 
 # ─────────────────────────────────────────────
 # 텔레그램 발송
 # ─────────────────────────────────────────────
+def deliver_messages(jobs):
+    """
+    jobs = [(chat_id, items), ...] 를 4096자 단위로 나눠 동시에 발송 (delivery.deliver)
+    반환: jobs 순서의 조각별 결과 목록
+    """
+    if not TELEGRAM_BOT_TOKEN:
+        print("⚠️ TELEGRAM 환경변수 없음")
+        return [[] for _ in jobs]
+    ready = [(chat_id, items) for chat_id, items in jobs if chat_id]
+    if len(ready) != len(jobs):
+        print("⚠️ TELEGRAM chat_id 없음")
+    results = iter(deliver(get_session(), TELEGRAM_BOT_TOKEN, ready, REQUEST_TIMEOUT))
+    return [next(results) if chat_id else [] for chat_id, _ in jobs]
+
 def send_to_telegram(message, chat_id=None):
     chat_id = chat_id or TELEGRAM_CHAT_ID
-    if not TELEGRAM_BOT_TOKEN or not chat_id:
-        print("⚠️ TELEGRAM 환경변수 없음")
-        return False
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": chat_id, "text": message, "parse_mode": "HTML", "disable_web_page_preview": True}
-    try:
-        r = requests.post(url, data=payload, timeout=REQUEST_TIMEOUT)
-        if r.status_code != 200:
-            print("❌ 텔레그램 응답:", r.status_code, r.text)
-        return r.status_code == 200
-    except Exception as e:
-        print("❌ 텔레그램 전송 예외:", e)
-        return False
+    return delivered(deliver_messages([(chat_id, message.split("\n"))])[0])
+
+# ─────────────────────────────────────────────
+# 네이버 호출 보호 (재시도 / 헤지 / 서킷 브레이커 — fetch_guard)
+# ─────────────────────────────────────────────
+_breaker = None
+_latency = None
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        with _init_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(get_store(), "naver")
+    return _breaker
+
+def get_latency_tracker():
+    """헤지 기준: 이 프로세스의 성공 응답 + 최근 실행 기록의 성공 응답 시간으로 시작"""
+    global _latency
+    if _latency is not None:
+        return _latency
+    with _init_lock:
+        if _latency is None:
+            samples = []
+            try:
+                for run in get_store().recent_runs(HISTORY_RUNS):
+                    samples += [e["duration_ms"] / 1000 for e in run.get("events", [])
+                                if e["phase"] == "naver_call" and e.get("status") == 200]
+            except Exception as e:
+                print("⚠️ 응답 시간 기록 로드 예외:", e)
+            _latency = LatencyTracker(samples)
+    return _latency
 
 # ─────────────────────────────────────────────
 # 뉴스 검색 (최적화 + 제외필터)
 # ─────────────────────────────────────────────
-def search_recent_news(search_keywords, include_keywords, exclude_keywords):
+def fetch_news_page(query, start, display=DISPLAY_PER_CALL):
     """
-    최신 기사만 효율적으로 검색:
-    - 30건이 모두 최신 기사일 때만 다음 페이지 호출
-    - 이전 기사 등장 시 즉시 종료
-    - include(포함) / exclude(제외) 제목 필터 적용
-    반환: found, loop_reports, latest_time, earliest_time, pub_times
-    loop_reports[*].title_include_pass = 포함 필터 통과 수(이후 제외 포함)
+    네이버 뉴스 검색 1페이지 요청 (공유 세션, guarded_call 로 재시도 / 헤지 / 차단 / 실행 마감).
+    반환: 200 response (r.fetch_info = 판단 내역) / 실패하면 FetchFailed(info)
     """
-    base_url = "https://openapi.naver.com/v1/search/news.json"
     headers = {
         "X-Naver-Client-Id": CLIENT_ID,
         "X-Naver-Client-Secret": CLIENT_SECRET,
         "User-Agent": UA,
     }
+    url = f"{NAVER_API_URL}?query={urllib.parse.quote(query)}&display={display}&start={start}&sort=date"
+    counter = get_call_counter()
+    if counter.exceeded():
+        raise FetchFailed({"attempts": 0, "retries": 0, "hedged": 0, "hedge_won": False, "status": None,
+                           "error": f"네이버 일일 호출 한도 도달 ({counter.today()}/{counter.quota})", "ms": 0.0})
 
-    last_checked = get_last_checked_time()
-    collected, pub_times, loop_reports = [], [], []
-    stop_due_to_old = False
-
-    for loop_count in range(1, MAX_LOOPS + 1):
-        query = " ".join(search_keywords)
-        start = (loop_count - 1) * DISPLAY_PER_CALL + 1
-        url = f"{base_url}?query={urllib.parse.quote(query)}&display={DISPLAY_PER_CALL}&start={start}&sort=date"
-
+    def send(timeout, hedge):
+        """HTTP 1회 (헤지 요청 포함 전부 호출 수 / naver_call 계측에 들어간다)"""
+        counter.add(1)
+        t0 = time.perf_counter()
         try:
-            r = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            r = get_session().get(url, headers=headers, timeout=timeout)
         except Exception as e:
-            print("❌ 요청 예외:", e)
-            break
-
-        if r.status_code != 200:
-            print(f"❌ 요청 실패: {r.status_code} {r.text}")
-            break
-
-        items = r.json().get("items", [])
-        if not items:
-            break
-
-        time_filtered = 0
-        new_articles = 0
-        title_include_fail = 0
-        title_exclude_hit = 0
-
-        for item in items:
-            title = html.unescape(item.get("title", "")).replace("<b>", "").replace("</b>", "")
-            link = (item.get("link") or "").strip()
-            pub_raw = item.get("pubDate")
-            if not pub_raw:
-                continue
+            run_metrics.record("naver_call", (time.perf_counter() - t0) * 1000, start=start, display=display,
+                               status=None, bytes=0, hedge=hedge, error=str(e))
+            raise
+        run_metrics.record("naver_call", (time.perf_counter() - t0) * 1000, start=start, display=display,
+                           status=r.status_code, bytes=len(r.content), hedge=hedge)
+        recorder = get_recorder()
+        if recorder:
+            recorder.record_response(query, start, display, r.status_code, r.text)
+        return r
 
+    try:
+        r, info = guarded_call(send, get_breaker(), get_latency_tracker(), NAVER_CONNECT_TIMEOUT,
+                               NAVER_READ_TIMEOUT, deadline_at=_deadline_at)
+    except FetchFailed as e:
+        run_metrics.record("naver_fetch", e.info["ms"], start=start, display=display,
+                           **{k: v for k, v in e.info.items() if k != "ms"})
+        raise
+    run_metrics.record("naver_fetch", info["ms"], start=start, display=display,
+                       **{k: v for k, v in info.items() if k != "ms"})
+    r.fetch_info = info
+    return r
+
+def iter_news_pages(query, ahead=PREFETCH_PAGES, display=DISPLAY_PER_CALL, planned=MAX_LOOPS, max_pages=MAX_LOOPS):
+    """
+    페이지를 순서대로 돌려주되, 다음 페이지들(ahead, 기본 PREFETCH_PAGES)을 미리 병렬 요청해 둔다.
+    - 계획 페이지(planned)는 display 건씩, 그 뒤(예상보다 기사가 많을 때)는 DISPLAY_MAX 건씩 필요할 때 하나씩
+      (계획 display 가 작아도 상한까지 받을 수 있는 건수가 줄지 않게 — start 는 앞 페이지 건수 누적)
+    - max_pages 를 넘기지 않는다 (MAX_LOOPS / 남은 호출 예산)
+    yield: (loop_count, 요청 건수, response 또는 None, 예외 또는 None — 보통 FetchFailed)
+    소비 측에서 중단(break/close)하면 대기 중인 요청은 취소되고, 진행 중인 응답은 버려진다.
+    """
+    ahead = max(1, ahead)
+    planned = max(1, planned)
+    page_display = lambda n: display if n <= planned else DISPLAY_MAX
+    page_start = lambda n: min(n - 1, planned) * display + max(0, n - 1 - planned) * DISPLAY_MAX + 1
+    pool = ThreadPoolExecutor(max_workers=ahead)
+    futures = {}
+    try:
+        for loop_count in range(1, max_pages + 1):
+            last_ahead = min(loop_count + ahead - 1, max(planned, loop_count), max_pages)
+            for n in range(loop_count, last_ahead + 1):
+                if n not in futures:
+                    futures[n] = pool.submit(fetch_news_page, query, page_start(n), page_display(n))
             try:
-                pub_dt = parsedate_to_datetime(pub_raw).astimezone(KST)
-            except Exception:
-                continue
+                yield loop_count, page_display(loop_count), futures.pop(loop_count).result(), None
+            except Exception as e:
+                yield loop_count, page_display(loop_count), None, e
+    finally:
+        for f in futures.values():
+            f.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
 
-            # ✅ 시간 필터: 이전 기사 등장 시 종료 플래그
-            if last_checked and pub_dt <= last_checked:
-                stop_due_to_old = True
-                continue
+def plan_fetch(query, since, ahead=PREFETCH_PAGES):
+    """
+    쿼리 하나의 이번 조회 계획 (planner.make_plan): 시간대별 유입률로 display / 페이지 수를 고르고
+    일일 호출 예산(NAVER_CALL_BUDGET, 미리 받기는 PREFETCH_RESERVE 만큼 남겨 둠)으로 상한을 건다.
+    ahead == 1(증분 조회)이면 계획 페이지도 1 — 미리 요청 없이 필요할 때만 다음 페이지.
+    """
+    counter = get_call_counter()
+    reserve = PREFETCH_RESERVE if run_metrics.kind == "prefetch" else 0
+    remaining = NAVER_CALL_BUDGET - counter.today() - reserve
+    plan = make_plan(ArrivalModel(get_store(), query), since, datetime.now(KST), remaining, MAX_LOOPS)
+    if ahead <= 1:
+        plan["pages"] = min(plan["pages"], 1)
+    run_metrics.record("plan", 0, query=query, **plan)
+    if plan["max_pages"] == 0:
+        print(f"⚠️ 네이버 일일 호출 예산 소진 ({counter.today()}/{NAVER_CALL_BUDGET}) → 조회 생략")
+    return plan
 
-            new_articles += 1
-            pub_times.append(pub_dt)
-            time_filtered += 1
+def learn_arrivals(query, since, articles):
+    """
+    조회 결과를 유입률 학습에 반영. since 이전 기사까지 내려갔으면 [since, 지금] 구간 전체,
+    중간에 끊겼으면(페이지 상한 / 오류) 받은 가장 오래된 기사 ~ 지금 구간만 관측으로 본다.
+    """
+    if since is None or not articles:
+        return
+    oldest = min(a["pub_dt"] for a in articles)
+    start = since if oldest <= since else oldest
+    try:
+        ArrivalModel(get_store(), query).observe(
+            start.astimezone(KST), datetime.now(KST), [a["pub_dt"] for a in articles if a["pub_dt"] > start])
+    except Exception as e:
+        print("⚠️ 유입률 기록 예외:", e)
 
-            # 1) 포함(통과) 필터: 비어 있으면 통과, 있으면 하나라도 포함해야 통과
-            include_ok = True
-            if include_keywords:
-                include_ok = any(kw.lower() in title.lower() for kw in include_keywords)
-            if not include_ok:
-                title_include_fail += 1
-                continue
+def news_source(query, counters, plan, ahead=PREFETCH_PAGES):
+    """
+    파이프라인 원천: 네이버 응답 페이지 → 원본 항목(+call_no) … PageEnd
+    요청 실패 / 빈 페이지면 멈춘다. 다음 페이지 응답은 하류가 PageEnd 뒤를 당길 때 꺼낸다
+    (그 사이 계획 페이지 안에서 ahead 만큼 미리 병렬 요청, 하류가 멈추면 취소).
+    상한(max_pages) 마지막 페이지가 꽉 찼으면 판단 내역에 "capped" — 뒤에 못 받은 기사가 있을 수 있다
+    """
+    pages = iter_news_pages(query, ahead=ahead, display=plan["display"], planned=plan["pages"],
+                            max_pages=plan["max_pages"])
+    try:
+        for loop_count, display, r, err in pages:
+            if err is not None:
+                # 재시도 / 헤지까지 실패 → 빈 페이지로 판단 내역만 남기고 멈춘다 (리포트에 실패 차수 표시)
+                info = getattr(err, "info", None) or {"error": str(err)}
+                print(f"❌ {loop_count}차 요청 실패:", info.get("error"))
+                yield PageEnd(loop_count, query, 0, display, info)
+                return
+
+            t0 = time.perf_counter()
+            raw = r.json().get("items", [])
+            counters.add_time(loop_count, "parse", time.perf_counter() - t0)
+            if not raw:
+                return
+            for item in raw:
+                yield {**item, "call_no": loop_count}
+            info = getattr(r, "fetch_info", None)
+            if loop_count == plan["max_pages"] and len(raw) >= display:
+                info = {**(info or {}), "capped": True}
+            yield PageEnd(loop_count, query, len(raw), display, info)
+    finally:
+        pages.close()
+
+def record_page_metrics(counters):
+    """파이프라인 카운터 → 페이지별 parse / filter 계측 기록"""
+    for n, ms in counters.timings("parse"):
+        if ms:
+            run_metrics.record("parse", ms, call_no=n, items=counters.pages[n]["fetched"])
+    for n, ms in counters.timings("filter"):
+        if ms:
+            run_metrics.record("filter", ms, call_no=n, items=counters.get(n, "time_filtered"))
+
+def iter_fetched_pages(query, since, ahead=PREFETCH_PAGES):
+    """
+    검색어 하나를 조회만 한다 (계획 → 원천 → 정규화 → 종료 규칙, 분류는 classify_pages):
+    - 한 페이지(display 건, plan_fetch)가 모두 since 이후일 때만 다음 페이지 사용
+    - since 이하 기사 등장 시 즉시 종료 (미리 받은 이후 페이지는 폐기)
+    - ahead = 동시에 요청해 두는 페이지 수 (증분 조회는 1페이지로 끝나는 게 보통이라 1)
+    - 끝까지 본 조회는 유입률 학습에 반영 (learn_arrivals)
+    yield: {"call_no", "query", "fetched", "display", "items": [기사...]} (응답 순서 유지)
+    """
+    plan = plan_fetch(query, since, ahead=ahead)
+    if plan["max_pages"] == 0:
+        return
+    counters = PageCounters()
+    stream = compose(news_source(query, counters, plan, ahead=ahead), normalize(counters), stop_at(since))
+    seen = []
+    try:
+        for page in iter_pages(stream):
+            n = page["call_no"]
+            if n in counters.pages:   # 실패한 페이지(PageEnd 만, 파싱 없음)는 계측할 것이 없다
+                run_metrics.record("parse", counters.pages[n]["ms"].get("parse", 0.0), call_no=n,
+                                   items=page["fetched"])
+            seen.extend(page["items"])
+            yield page
+    finally:
+        stream.close()
+        learn_arrivals(query, since, seen)
+
+def fetch_news(query, since, ahead=PREFETCH_PAGES):
+    """검색어 하나 조회 결과 페이지 목록 (iter_fetched_pages)"""
+    return list(iter_fetched_pages(query, since, ahead=ahead))
 
-            # 2) 제외 필터: 하나라도 걸리면 즉시 제외
-            if exclude_keywords and any(ek.lower() in title.lower() for ek in exclude_keywords):
-                title_exclude_hit += 1
+def fetch_news_merged(queries, since, ahead=PREFETCH_PAGES):
+    """
+    OR 조회: 검색어마다 따로 조회해서 pubDate 최신순으로 k-way 병합 (heapq.merge), 링크 중복 제거.
+    - 첫 페이지는 모든 검색어를 동시에 요청, 이후 페이지는 병합이 그 스트림을 다 소비했을 때만 요청
+    - 각 스트림은 since 를 넘는 순간 페이지 넘김을 멈춘다 (iter_fetched_pages 와 같은 규칙)
+    - 병합 선두가 since 를 넘으면 전체 종료 — 남은 스트림의 다음 페이지는 요청하지 않는다
+    반환: pages (fetch_news 형식, 호출 순서) — 각 페이지 items 는 병합에서 살아남은 기사만
+    """
+    streams = [iter_fetched_pages(q, since, ahead=ahead) for q in queries]
+    fetched = []   # 실제로 받은 페이지 (호출 순서)
+
+    def items_of(first, stream):
+        page = first
+        while page is not None:
+            fetched.append(page)
+            yield from page["items"]
+            page = next(stream, None)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(streams)) as pool:
+            firsts = list(pool.map(lambda s: next(s, None), streams))
+        merged = heapq.merge(*(items_of(f, s) for f, s in zip(firsts, streams)),
+                             key=lambda a: a["pub_dt"], reverse=True)
+        kept, links = set(), set()
+        for a in merged:
+            if a["link"] in links:
                 continue
+            links.add(a["link"])
+            kept.add(id(a))
+            if since and a["pub_dt"] <= since:
+                break   # 이후는 모든 스트림이 since 이하
+    finally:
+        for s in streams:
+            s.close()
 
-            # 3) 최종 통과
-            collected.append((title, link))
-
-        # 포함 통과 수(제외 포함): 최신 처리된 것 중 포함 실패를 뺀 값
-        title_include_pass = max(0, time_filtered - title_include_fail)
-
-        loop_reports.append({
-            "call_no": loop_count,
-            "fetched": len(items),
-            "time_filtered": time_filtered,
-            "title_include_fail": title_include_fail,
-            "title_include_pass": title_include_pass,
-            "title_exclude_hit": title_exclude_hit,
-        })
-
-        # ✅ 루프 종료 조건
-        if stop_due_to_old:
-            print(f"⏹️ {loop_count}차에서 이전 기사 등장 → 루프 종료")
-            break
-        if new_articles < DISPLAY_PER_CALL:
-            print(f"⏹️ {loop_count}차에서 신규 기사 부족({new_articles}/{DISPLAY_PER_CALL}) → 루프 종료")
-            break
+    dropped = sum(len(p["items"]) for p in fetched) - len(kept)
+    print(f"🔀 OR 조회 {len(queries)}개 → 호출 {len(fetched)}회, 병합 {len(kept)}건 (중복/미사용 {dropped}건)")
+    return [
+        {**p, "call_no": n, "items": [a for a in p["items"] if id(a) in kept]}
+        for n, p in enumerate(fetched, start=1)
+    ]
 
-    latest_time = max(pub_times).strftime("%m-%d(%H:%M)") if pub_times else "N/A"
-    earliest_time = min(pub_times).strftime("%m-%d(%H:%M)") if pub_times else "N/A"
-    return collected, loop_reports, latest_time, earliest_time, pub_times
+def fetch_queries(queries, since, ahead=PREFETCH_PAGES):
+    """쿼리 하나면 그대로, 여럿이면 OR 병합 조회"""
+    if len(queries) == 1:
+        return fetch_news(queries[0], since, ahead=ahead)
+    return fetch_news_merged(queries, since, ahead=ahead)
 
-# ─────────────────────────────────────────────
-# 메인 실행
-# ─────────────────────────────────────────────
-def run_bot():
-    now = datetime.now(KST)
-    print(f"\n🕒 실행: {now.strftime('%Y-%m-%d %H:%M:%S')} KST")
+def new_article_fetcher():
+    """본문 재확인용 fetcher (BODY_FETCH=1 일 때만, 실행마다 새로 — 마감/요청 상한이 실행 단위)"""
+    if not BODY_FETCH:
+        return None
+    from article_fetch import ArticleFetcher, PageCache
+    return ArticleFetcher(PageCache(get_store()), UA, per_host=BODY_FETCH_PER_HOST,
+                          deadline_s=BODY_FETCH_DEADLINE, max_fetches=BODY_FETCH_MAX)
 
-    # ✅ 짝수시 정시(00분)만 발송
-    if now.minute != 0 or now.hour % 2 != 0:
-        print("⏸️ 발송 타임이 아님 → 스킵")
-        return
+def record_body_fetch(fetcher):
+    if fetcher is not None and fetcher.stats["urls"]:
+        stats = dict(fetcher.stats)
+        run_metrics.record("body_fetch", stats.pop("ms"), **stats)
 
-    if already_sent_this_hour():
-        print("⏹️ 이미 이번 시각에 발송 완료 → 중복 방지")
-        return
+def classify_pages(pages, matcher, sent_index, last_checked, stop_early=True, extra=(), fetcher=None):
+    """
+    조회한 페이지에 프로필 하나의 규칙(시간 → 중복 → 포함 → 제외 → (본문) → extra 단계)을 적용해 상태를 붙인다.
+    - stop_early: 이 프로필 혼자 조회했다면 멈췄을 페이지까지만 본다
+      (공유 조회는 가장 오래된 last_checked 기준이라 다른 프로필 몫의 페이지가 더 있을 수 있음)
+    - fetcher: 포함 필터를 못 넘은 기사를 본문으로 재확인 (new_article_fetcher)
+    반환: articles, loop_reports
+    articles[*] = {"call_no", "title", "description", "link", "originallink", "keys", "pub_dt", "status",
+                   "include_hits", "exclude_hits"}
+    loop_reports[*].title_include_pass = 포함 필터 통과 수(이후 제외 포함, 중복 제외, 본문 통과 포함)
+    """
+    counters = PageCounters()
+    stop = stop_at(last_checked, log=False) if stop_early else None
+    stages = classify_stages(matcher, sent_index, last_checked, counters, stop=stop, extra=extra, fetcher=fetcher)
+    articles = collect(compose(replay_pages(pages), *stages), counters)
+    record_page_metrics(counters)
+    return articles, counters.loop_reports()
+
+def classify_recent_news(search_keywords, include_keywords, exclude_keywords, matcher=None, sent_index=None,
+                         since=None, ahead=PREFETCH_PAGES, extra=()):
+    """
+    검색어 하나 조회 + 분류를 한 파이프라인으로 (기본 프로필 단독 실행용):
+    계획 → 원천 → 정규화 → 시간 → 종료 규칙 → 중복 → 포함/제외 → extra → sink
+    - 페이지는 하류가 필요할 때만 넘기고, 종료 규칙에 걸리면 이후 페이지는 요청하지 않는다
+    - 상태: stale / duplicate / include_fail / exclude_hit / passed
+    - matcher 를 주지 않으면 include/exclude 목록으로 컴파일 (목록이 같으면 캐시 재사용)
+    - since 를 주면 last_checked 대신 그 시각을 시간 필터 경계로 사용
+    반환: articles, loop_reports
+    """
+    matcher = matcher or compile_matcher(include_keywords, exclude_keywords)
+    sent_index = sent_index if sent_index is not None else get_sent_index()
+    last_checked = since if since is not None else get_last_checked_time()
+    query = " ".join(search_keywords)
+    plan = plan_fetch(query, last_checked, ahead=ahead)
+    if plan["max_pages"] == 0:
+        return [], []
+    counters = PageCounters()
+    fetcher = new_article_fetcher()
+    source = news_source(query, counters, plan, ahead=ahead)
+    stages = classify_stages(matcher, sent_index, last_checked, counters, stop=stop_at(last_checked), extra=extra,
+                             fetcher=fetcher)
+    articles = collect(compose(source, normalize(counters), *stages), counters)
+    record_page_metrics(counters)
+    record_body_fetch(fetcher)
+    learn_arrivals(query, last_checked, articles)
+    return articles, counters.loop_reports()
+
+class PrefetchBuffer:
+    """
+    정시 전 워밍업 동안 쿼리 목록 하나에 대해 받아 둔 페이지 (분류 전, 프로필들이 공유).
+    refresh() 는 지금까지 본 가장 최신 pubDate 이후만 조회해서 덧붙인다
+    → 정시에는 보통 1회 호출(증분)만으로 발송 목록이 완성된다.
+    조회 경계(since)가 바뀌면(다른 경로로 발송됨) 버퍼를 비우고 처음부터 다시 받는다.
+    앞 페이지를 받은 뒤 요청이 실패하거나 상한 페이지까지 전부 신규면(truncated) 그 뒤가 비므로
+    실패 / 상한 표시를 남겨 두고 (발송 때 fetch_truncated → watermark 유지) 다음 refresh 는 base 부터 다시 채운다.
+    """
+
+    def __init__(self):
+        self.pages = []
+        self.links = set()
+        self.base = None          # 버퍼를 채우기 시작할 때의 조회 경계
+        self.watermark = None     # 버퍼에 담긴 가장 최신 pubDate
+        self.filled = False
+        self.truncated = False    # 담긴 기사 사이에 못 받은 구간이 있음 (다음 refresh 는 base 부터)
+
+    def reset(self):
+        self.__init__()
+
+    def refresh(self, queries, since):
+        if self.filled and since != self.base:
+            print("🔄 last_checked 변경 → 미리 받은 기사 폐기")
+            self.reset()
+        if not self.filled:
+            self.base = since
+
+        refill = self.filled and self.truncated
+        if refill:
+            print("🔁 미리 받은 기사 사이에 빈 구간 → 시작 경계부터 다시 받기")
+        bound = self.watermark if self.watermark is not None and not refill else self.base
+        pages = fetch_queries(queries, bound, ahead=PREFETCH_PAGES if refill or not self.filled else 1)
+        new_count, received, gap = 0, set(), False
+        before = len(self.pages)
+        for page in pages:
+            if page.get("fetch") and page["fetch"].get("error"):
+                if page.get("query") not in received:
+                    continue   # 첫 페이지 실패는 빈 구간이 없다 — 다음 refresh 가 같은 경계부터 받는다
+                gap = True     # 실패 페이지를 남겨 발송 리포트 / fetch_truncated 에 보이게
+            elif page["fetched"]:
+                received.add(page.get("query"))
+                if page["fetch"] and page["fetch"].get("capped") and \
+                        all(not bound or a["pub_dt"] > bound for a in page["items"]):
+                    gap = True
+            items = page["items"]
+            if self.filled:
+                items = [a for a in items if not bound or a["pub_dt"] > bound]   # 첫 조회는 stale 포함 그대로
+            items = [a for a in items if a["link"] not in self.links]
+            self.links.update(a["link"] for a in items)
+            # 호출 번호는 버퍼 전체에서 이어지게
+            self.pages.append({**page, "call_no": len(self.pages) + 1, "items": items})
+            pubs = [a["pub_dt"] for a in items if not self.base or a["pub_dt"] > self.base]
+            new_count += len(pubs)
+            if pubs:
+                self.watermark = max([self.watermark or pubs[0]] + pubs)
+        if refill and not gap:
+            # 빈 구간을 채웠다 → 이전 실패 페이지 / 상한 표시는 더 이상 truncation 이 아니다
+            kept = [p if not (p.get("fetch") or {}).get("capped") else
+                    {**p, "fetch": {k: v for k, v in p["fetch"].items() if k != "capped"}}
+                    for p in self.pages[:before] if not (p.get("fetch") and p["fetch"].get("error"))]
+            kept += self.pages[before:]
+            self.pages = [{**p, "call_no": n} for n, p in enumerate(kept, start=1)]
+        self.truncated = gap
+        self.filled = True
+        total = sum(len(p["items"]) for p in self.pages)
+        print(f"📥 미리 받기: 신규 {new_count}건 (누적 {total}건, 호출 {len(pages)}회)")
+        return self.pages
+
+def shared_since(members):
+    """같은 쿼리를 쓰는 프로필들의 조회 경계 = 가장 오래된 last_checked (하나라도 없으면 None)"""
+    marks = [get_last_checked_time(p) for p in members]
+    return None if any(m is None for m in marks) else min(marks)
 
-    search_keywords = load_keywords(SEARCH_KEYWORDS_FILE)
-    include_keywords = load_keywords(FILTER_KEYWORDS_FILE)
-    exclude_keywords = load_keywords(EXCLUDE_KEYWORDS_FILE)
+def fetch_shared(groups, buffers=None):
+    """
+    쿼리 목록별로 한 번씩만 조회 (서로 다른 쿼리 목록은 동시에).
+    groups = {(query, ...): [profile...]} (profiles.group_by_query)
+    buffers({(query, ...): PrefetchBuffer})를 주면 버퍼에 증분만 받아 합친다.
+    반환: [(members, pages, in_order)] — in_order: 한 스트림을 순서대로 받은 결과라 페이지 단위 조기 종료가 유효
+    """
+    if not groups:
+        return []
+    plans = [(queries, members, shared_since(members)) for queries, members in groups.items()]
+    if buffers is not None:
+        for queries, _, _ in plans:
+            buffers.setdefault(queries, PrefetchBuffer())
+
+    def fetch(queries, since):
+        if buffers is not None:
+            return buffers[queries].refresh(queries, since)
+        return fetch_queries(queries, since)
 
-    found, loop_reports, latest_time, earliest_time, pub_times = search_recent_news(
-        search_keywords, include_keywords, exclude_keywords
+    with ThreadPoolExecutor(max_workers=len(plans)) as pool:
+        futures = [(queries, members, pool.submit(fetch, queries, since)) for queries, members, since in plans]
+        return [(members, f.result(), buffers is None and len(queries) == 1) for queries, members, f in futures]
+
+def new_scorer(profile, now=None):
+    """프로필의 키워드 가중치(filter_keywords 파일) + 언론사 가중치로 관련도 점수기"""
+    snap = get_keyword_snapshot([profile])
+    return Scorer(
+        snap.get_weights(profile["filter_keywords_file"]),
+        snap.get_outlets(profile.get("outlet_weights_file")),
+        now or datetime.now(KST),
     )
 
-    sent_final = len(found)  # 최종 통과(제외 제외)
-    total_latest = sum(r["time_filtered"] for r in loop_reports)
-    total_excluded = sum(r["title_exclude_hit"] for r in loop_reports)
-    total_include_pass = sum(r["title_include_pass"] for r in loop_reports)
+def classify_profiles(shared, matchers, fetcher=None):
+    """
+    공유 조회 결과에 프로필별 matcher / 발송 기록 / last_checked / 관련도 점수를 적용
+    (fetcher 는 프로필이 함께 쓴다 — 같은 기사 본문은 한 번만 가져옴)
+    반환: {profile name: (articles, loop_reports)}
+    """
+    results = {}
+    now = datetime.now(KST)
+    for members, pages, in_order in shared:
+        for p in members:
+            articles, loop_reports = classify_pages(
+                pages, matchers[p["name"]], get_sent_index(p), get_last_checked_time(p), stop_early=in_order,
+                extra=[score_stage(new_scorer(p, now))], fetcher=fetcher,
+            )
+            if not in_order:
+                # 증분 페이지가 뒤에 붙었거나(미리 받기) 여러 스트림 페이지가 섞여 있음(OR)
+                articles.sort(key=lambda a: a["pub_dt"], reverse=True)
+            results[p["name"]] = (articles, loop_reports)
+    return results
 
-    # 강제 시간(0/6/12/18)은 최소 1건이면 발송, 그 외 시간은 MIN_SEND_THRESHOLD 이상이면 발송
-    should_send = (sent_final >= 1 if now.hour in FORCE_HOURS else sent_final >= MIN_SEND_THRESHOLD)
+def collect_profiles(profiles, buffers=None):
+    """키워드 로드 → 검색어별 공유 조회 → 프로필별 분류. 반환: {profile name: (articles, loop_reports)}"""
+    with run_metrics.phase("keyword_load") as rec:
+        snap = get_keyword_snapshot(profiles, rec)
+        groups = group_by_query(profiles, snap.get_keywords)
+        matchers = {
+            p["name"]: snap.get_matcher(p["filter_keywords_file"], p["exclude_keywords_file"]) for p in profiles
+        }
+    fetcher = new_article_fetcher()
+    results = classify_profiles(fetch_shared(groups, buffers), matchers, fetcher)
+    record_body_fetch(fetcher)
+    return results
 
-    if should_send and found:
-        msg = "\n".join([f"{i+1}. <b>{html.escape(t)}</b>\n{l}" for i, (t, l) in enumerate(found)])
-        if send_to_telegram(msg):
-            mark_sent_now()
-            if pub_times:
-                mark_checked_time(max(pub_times))
-            print("✅ 본 채널 발송 완료")
-    else:
-        print("⏸️ 본채널 발송 조건 미충족")
+def articles_with_status(articles, status):
+    """분류 결과에서 특정 상태의 (title, link) 목록"""
+    return [(a["title"], a["link"]) for a in articles if a["status"] == status]
 
-    # ✅ 관리자 리포트 — 새 포맷
+def excluded_with_hits(articles):
+    """제외 히트 기사 (title + 걸린 제외 키워드, link) 목록 — 리포트용"""
+    return [
+        (f"{a['title']} (제외: {', '.join(a['exclude_hits'])})", a["link"])
+        for a in articles if a["status"] == STATUS_EXCLUDE_HIT
+    ]
+
+def summarize_news(articles):
+    """
+    분류 결과 → 기존 search_recent_news 반환 형식 (loop_reports 제외)
+    반환: found, latest_time, earliest_time, pub_times
+    """
+    found = articles_with_status(articles, STATUS_PASSED)
+    pub_times = [a["pub_dt"] for a in articles if a["status"] != STATUS_STALE]
+    latest_time = max(pub_times).strftime("%m-%d(%H:%M)") if pub_times else "N/A"
+    earliest_time = min(pub_times).strftime("%m-%d(%H:%M)") if pub_times else "N/A"
+    return found, latest_time, earliest_time, pub_times
+
+def cluster_passed(articles, fingerprint_index=None):
+    """
+    최종 통과 기사를 유사 제목끼리 묶고, 최근 회차에 보낸 기사와 비슷한 것은 뺀다.
+    반환: found, clusters, repeats
+    found[*] = (대표 title, 대표 link, 묶인 유사 기사 수)
+    """
+    passed = [a for a in articles if a["status"] == STATUS_PASSED]
+    index = fingerprint_index if fingerprint_index is not None else get_fingerprint_index()
+    clusters, repeats = cluster_articles(passed, index=index)
+    return cluster_items(clusters), clusters, repeats
+
+def cluster_items(clusters):
+    """묶음 목록 → found 형식 (대표 title, 대표 link, 묶인 유사 기사 수)"""
+    return [(c["article"]["title"], c["article"]["link"], len(c["members"]) - 1) for c in clusters]
+
+def search_recent_news(search_keywords, include_keywords, exclude_keywords):
+    """
+    classify_recent_news 결과를 기존 형식으로 돌려준다.
+    반환: found, loop_reports, latest_time, earliest_time, pub_times
+    """
+    articles, loop_reports = classify_recent_news(search_keywords, include_keywords, exclude_keywords)
+    found, latest_time, earliest_time, pub_times = summarize_news(articles)
+    return found, loop_reports, latest_time, earliest_time, pub_times
+
+# ─────────────────────────────────────────────
+# 리포트 / 메시지 구성
+# ─────────────────────────────────────────────
+def format_article_lines(items):
+    """(title, link[, 유사 기사 수]) 목록 → 번호 붙은 텔레그램 HTML 줄"""
+    lines = []
+    for i, item in enumerate(items, start=1):
+        t, l = item[0], item[1]
+        similar = f" (+{item[2]} 유사)" if len(item) > 2 and item[2] else ""
+        lines.append(f"{i}. <b>{html.escape(t)}</b>{similar}\n{l}")
+    return lines
+
+def build_admin_report(sent, loop_reports, latest_time, earliest_time, sent_final, found=None, excluded=None,
+                       clustered=0, repeats=None, profile_name=None, held=None):
+    """
+    관리자 리포트 줄 목록 (found/excluded 를 주면 기사 목록까지 포함)
+    clustered = 유사 묶음으로 합쳐진 기사 수
+    repeats = 이전 회차와 비슷해 뺀 기사 (found 형식, 있으면 detail 과 관계없이 표시 — 잘못 뺀 기사 확인용)
+    held = 점수 상위 K 밖이라 본 채널에서 뺀 기사 (found 형식, 있으면 detail 과 관계없이 표시)
+    profile_name 을 주면 맨 위에 프로필 이름 (프로필이 여럿일 때 리포트 구분용)
+    """
     now = datetime.now(KST)
-    status_icon = "✅" if should_send and found else "⏸️"
-    status_text = "발송" if should_send and found else "보류"
+    status_icon = "✅" if sent else "⏸️"
+    status_text = "발송" if sent else "보류"
+    total_latest = sum(r["time_filtered"] for r in loop_reports)
+    total_excluded = sum(r["title_exclude_hit"] for r in loop_reports)
+    total_include_pass = sum(r["title_include_pass"] for r in loop_reports)
+    total_body = sum(r.get("body_rescued", 0) for r in loop_reports)
+    total_duplicate = sum(r.get("duplicate_hit", 0) for r in loop_reports)
 
     report_lines = []
+    if profile_name:
+        report_lines.append(f"🏷️ {profile_name}")
     # 1) 상태 — 대괄호 수치는 최종 발송 후보 수(=제외 제외 후)
     report_lines.append(f"{status_icon} {status_text} [{sent_final}건] ({now.strftime('%H:%M:%S')} 기준)")
-    # 2) 집계 — 제목통과는 포함 필터 통과 수(제외 포함)
-    report_lines.append(f"(제외{total_excluded}) 제목통과 {total_include_pass} / 최신{total_latest}")
+    # 2) 집계 — 제목통과는 포함 필터 통과 수(제외 포함, 괄호 안은 그중 본문으로 통과)
+    dup_text = f"·중복{total_duplicate}" if total_duplicate else ""
+    dup_text += f"·유사{clustered}" if clustered else ""
+    dup_text += f"·반복{len(repeats)}" if repeats else ""
+    body_text = f"(본문{total_body})" if total_body else ""
+    report_lines.append(f"(제외{total_excluded}{dup_text}) 제목통과 {total_include_pass}{body_text} / 최신{total_latest}")
     # 3) 각 호출 결과
+    queries = {r.get("query") for r in loop_reports}
     for r in loop_reports:
-        report_lines.append(f"({r['call_no']}차) 최신{r['time_filtered']} / 호출{r['fetched']}")
+        query = f" {r['query']}" if len(queries) > 1 else ""   # OR 조회일 때만 어느 검색어인지 표시
+        notes = f" ·재시도{r['retries']}" if r.get("retries") else ""
+        notes += f" ·헤지{r['hedged']}" if r.get("hedged") else ""
+        notes += " ·상한" if r.get("capped") else ""
+        if r.get("error"):
+            notes += f" ❌ {r['error'][:80]}"
+        report_lines.append(f"({r['call_no']}차{query}) 최신{r['time_filtered']} / 호출{r['fetched']}{notes}")
     # 4) 최신 시간
     report_lines.append(f"(최신) {latest_time} ~ {earliest_time}")
+    # 5) 단계별 소요(최근 실행) / 오늘 호출 수
+    report_lines.extend(stats_report_lines())
+
+    # 통과 기사
+    if found:
+        report_lines.append("───────────────────────────────")
+        report_lines.append("📌 통과 기사")
+        report_lines.extend(format_article_lines(found))
+
+    # 상위 K 밖 기사 (이번 회차 본 채널에서 뺀 것)
+    if held:
+        report_lines.append("───────────────────────────────")
+        report_lines.append(f"📎 상위 {sent_final}건 밖 (본 채널 생략 {len(held)}건)")
+        report_lines.extend(format_article_lines(held))
 
-    send_to_telegram("\n".join(report_lines), chat_id=ADMIN_CHAT_ID)
-    print("📊 관리자 리포트 발송 완료")
+    # 이전 회차 반복으로 뺀 기사 (링크는 발송 기록에 남으므로 다시 올라오지 않는다)
+    if repeats:
+        report_lines.append("───────────────────────────────")
+        report_lines.append(f"🔁 이전 회차와 비슷해 뺀 기사 {len(repeats)}건")
+        report_lines.extend(format_article_lines(repeats))
+
+    # 제외된 기사(포함 통과 후 제외된 것만)
+    if excluded:
+        report_lines.append("───────────────────────────────")
+        report_lines.append("🚫 제외된 기사")
+        report_lines.extend(format_article_lines(excluded))
+    return report_lines
 
 # ─────────────────────────────────────────────
-# 2시간 루프
+# 프로필별 발송 계획 / 발송 / 기록
 # ─────────────────────────────────────────────
-if __name__ == "__main__":
-    if already_running():
-        sys.exit(0)
+def fetch_truncated(loop_reports):
+    """
+    조회가 중간에 끊겨 뒤(더 오래된 쪽)에 못 받은 신규 기사가 있을 수 있는지 (페이지 전부 확인 —
+    미리 받기 버퍼는 끊긴 조회 뒤에 증분 페이지가 붙는다):
+    - 상한(max_pages)에 걸린 페이지가 전부 신규였거나
+    - 같은 검색어의 앞 페이지를 받은 뒤의 요청이 실패했으면 True
+    """
+    received = set()
+    for r in loop_reports:
+        if r.get("error"):
+            if r.get("query") in received:
+                return True
+        elif r["fetched"]:
+            received.add(r.get("query"))
+            if r.get("capped") and r["time_filtered"] == r["fetched"]:
+                return True
+    return False
 
-    print("🚀 fcanews bot 시작 (짝수시 정시 / 2시간 간격)")
-    while True:
-        try:
-            now = datetime.now(KST)
-            # 다음 짝수시 정시 계산
-            next_hour = ((now.hour + 2) // 2) * 2
-            next_day = now
-            if next_hour >= 24:
-                next_hour -= 24
-                next_day = now + timedelta(days=1)
-
-            target_time = next_day.replace(hour=next_hour, minute=0, second=0, microsecond=0)
-            wait_seconds = (target_time - now).total_seconds()
-            if wait_seconds > 0:
-                print(f"⏰ 다음 실행 시각: {target_time.strftime('%Y-%m-%d %H:%M:%S')} KST ({int(wait_seconds/60)}분 후)")
-                time.sleep(wait_seconds)
-
-            run_bot()
+def plan_profile_send(profile, now, articles, loop_reports, force=False, detail=False, channel=True, label=None):
+    """
+    프로필 하나의 분류 결과 → 발송 계획 (묶기 → 발송 조건 → 본 채널/관리자 메시지)
+    - force: 시각과 관계없이 1건 이상이면 발송 대상 (강제 발송 / 미리보기)
+    - detail: 관리자 리포트에 통과/제외 기사 목록 포함
+    - channel: False 면 관리자 리포트만 (미리보기)
+    - 묶음이 top_k 보다 많으면 점수 상위 top_k 묶음만 본 채널로 (점수순), 나머지는 관리자 리포트에만
+    - 조회가 중간에 끊겼으면(fetch_truncated) 발송해도 watermark 는 그대로 둔다 (못 받은 기사를 다음 회차에)
+    반환: {"profile", "articles", "clusters", "held", "channel", "pub_times", "found", "loop_reports",
+           "truncated", "sending", "jobs"}
+    """
+    _, latest_time, earliest_time, pub_times = summarize_news(articles)
+    with run_metrics.phase("cluster", profile=profile["name"]):
+        _, all_clusters, repeats = cluster_passed(articles, get_fingerprint_index(profile))
+        clusters, held = select_top(all_clusters, profile.get("top_k", 0))
+    found = cluster_items(clusters)
+    clustered = sum(len(c["members"]) - 1 for c in all_clusters)
+
+    sent_final = len(found)  # 최종 통과(제외 제외, 유사 기사는 1건으로, 상위 K 까지)
+
+    # 강제 시간(force_hours)은 최소 1건이면 발송, 그 외 시간은 min_send_threshold 이상이면 발송
+    # (발송 조건은 상위 K 로 자르기 전 묶음 수 기준)
+    if force or now.hour in profile["force_hours"]:
+        should_send = len(all_clusters) >= 1
+    else:
+        should_send = len(all_clusters) >= profile["min_send_threshold"]
+    should_send = should_send and bool(found)
+    sending = should_send and channel
+    if channel and not sending:
+        print(f"⏸️ [{profile['name']}] 본채널 발송 조건 미충족")
+
+    report_lines = build_admin_report(
+        should_send, loop_reports, latest_time, earliest_time, sent_final,
+        found=found if detail else None, excluded=excluded_with_hits(articles) if detail else None,
+        clustered=clustered, repeats=[(a["title"], a["link"]) for a in repeats], profile_name=label,
+        held=cluster_items(held),
+    )
+    jobs = [(profile["admin_chat_id"], report_lines)]
+    if sending:
+        jobs.insert(0, (profile["chat_id"], format_article_lines(found)))
+    return {
+        "profile": profile,
+        "articles": articles,
+        "clusters": clusters,
+        "held": held,
+        "channel": channel,
+        "pub_times": pub_times,
+        "found": found,
+        "loop_reports": loop_reports,
+        "truncated": fetch_truncated(loop_reports),
+        "sending": sending,
+        "jobs": jobs,
+    }
+
+def deliver_plans(plans):
+    """모든 프로필의 본 채널/관리자 메시지를 한 번에 동시 발송하고, 결과를 plan["results"] 에 나눠 담는다."""
+    jobs = [job for plan in plans for job in plan["jobs"]]
+    with run_metrics.phase("send") as rec:
+        results = deliver_messages(jobs)
+        chunks = [r for job in results for r in job]
+        rec["chunks"] = len(chunks)
+        rec["failed"] = sum(1 for r in chunks if not r["ok"])
+        rec["retries"] = sum(r["retries"] for r in chunks)
+        rec["bytes"] = sum(r["chars"] for r in chunks)
+    it = iter(results)
+    for plan in plans:
+        plan["results"] = [next(it) for _ in plan["jobs"]]
+        if delivered(plan["results"][-1]):
+            print(f"📊 [{plan['profile']['name']}] 관리자 리포트 발송 완료")
+    return plans
+
+def commit_plan(plan):
+    """
+    본 채널 조각이 모두 전달된 경우에만 발송 시각 / 링크 / watermark 기록 (호출 측 트랜잭션 안에서)
+    반환: 기록 여부
+    """
+    if not plan["sending"]:
+        return False
+    profile = plan["profile"]
+    channel_results = plan["results"][0]
+    if not delivered(channel_results):
+        ok_count = sum(1 for r in channel_results if r["ok"])
+        print(f"❌ [{profile['name']}] 본 채널 발송 실패 ({ok_count}/{len(channel_results)}개 메시지 전달) → 기록 유지")
+        return False
+    with run_metrics.phase("state_write", profile=profile["name"]):
+        mark_sent_now(profile)
+        # 링크는 상위 K 밖 기사까지 기록 (다음 회차에 다시 올리지 않음), 묶음 지문 / 보관 발송 기록은 실제 보낸 것만
+        mark_sent_articles(plan["articles"], plan["clusters"], profile)
+        recorder = get_recorder()
+        if recorder:
+            held = {id(a) for c in plan.get("held", ()) for a in c["members"]}
+            recorder.record_sent(profile["name"], [
+                a for a in plan["articles"] if a["status"] == STATUS_PASSED and id(a) not in held
+            ])
+        if plan.get("truncated"):
+            print(f"⚠️ [{profile['name']}] 조회가 페이지 상한 / 실패로 끊김 → 최신 기사 시각 유지 (다음 회차에 이어 받음)")
+        elif plan["pub_times"]:
+            mark_checked_time(max(plan["pub_times"]), profile)
+    print(f"✅ [{profile['name']}] 본 채널 발송 완료 ({len(channel_results)}개 메시지)")
+    return True
+
+# ─────────────────────────────────────────────
+# 집계 버킷 (aggregate) — 일일 다이제스트 / 최근 N일
+# ─────────────────────────────────────────────
+def fold_plan(plan, sent):
+    """발송 실행 1회의 분류 결과(+ 보냈으면 보낸 묶음)를 집계 버킷에 더한다 (호출 측 트랜잭션 안에서)"""
+    profile = plan["profile"]
+    try:
+        with run_metrics.phase("aggregate", profile=profile["name"]) as rec:
+            rec["articles"] = Aggregates(get_store()).fold(
+                profile["scope"], plan["articles"], plan["clusters"] if sent else (), datetime.now(KST),
+            )
+    except Exception as e:
+        print(f"⚠️ [{profile['name']}] 집계 기록 예외:", e)
+
+def digest_report(profile, days=1, until=None, include_today=False, label=None):
+    """
+    최근 days 일 집계 리포트 줄 — 기본은 until(없으면 지금)이 든 날 자정까지 (= 어제까지),
+    include_today 면 그날 지금까지 포함
+    """
+    end = datetime.fromtimestamp(day_start(until or datetime.now(KST)), KST)
+    if include_today:
+        end += timedelta(days=1)
+    since = end - timedelta(days=days)
+    totals = Aggregates(get_store()).totals(profile["scope"], since, end)
+    return digest_lines(totals, since, end, profile_name=label)
+
+def send_digests(days=1, until=None, include_today=False):
+    """모든 프로필 다이제스트를 관리자 채널로 (동시 발송). 반환: [(profile, lines)]"""
+    all_profiles = get_profiles()
+    reports = [
+        (p, digest_report(p, days, until, include_today, label=profile_label(p, all_profiles)))
+        for p in all_profiles
+    ]
+    results = deliver_messages([(p["admin_chat_id"], lines) for p, lines in reports])
+    for (p, _), result in zip(reports, results):
+        if delivered(result):
+            print(f"📈 [{p['name']}] 다이제스트 발송 완료")
+    return reports
+
+# ─────────────────────────────────────────────
+# 메인 실행
+# ─────────────────────────────────────────────
+def run_jobs(kinds, now, buffers=None):
+    """
+    발송(send) / 강제 발송(force_send) / 미리보기(preview) 를 실행 1회로 — 여럿이 겹쳐도
+    조회·분류는 프로필마다 한 번, 모든 메시지는 동시 발송, 기록은 본 채널로 보낸 프로필만.
+    - send: 이번 시각에 아직 안 보낸 프로필만, 발송 조건(min_send_threshold / force_hours) 적용
+    - force_send: 모든 프로필, 1건 이상이면 발송 (send 보다 우선) + 관리자 리포트에 기사 목록
+    - preview: 모든 프로필, 관리자 리포트만 (기록 없음)
+    buffers 는 send 때만 (워밍업 동안 받아 둔 기사에 증분 조회분만 합친다)
+    반환: plans
+    """
+    all_profiles = get_profiles()
+    force = "force_send" in kinds
+    preview = "preview" in kinds
+    channel = all_profiles if force else []
+    if "send" in kinds and not force:
+        channel = [p for p in all_profiles if not already_sent_this_hour(p, now)]
+        if not channel and not preview:
+            print("⏹️ 이미 이번 시각에 발송 완료 → 중복 방지")
+            return []
+    targets = all_profiles if preview else channel
+    channel_names = {p["name"] for p in channel}
 
+    begin_run("+".join(JOB_KINDS[k] for k in kinds))
+    try:
+        classified = collect_profiles(targets, buffers if not force else None)
+        plans = []
+        for p in targets:
+            label = profile_label(p, all_profiles)
+            if p["name"] in channel_names:
+                plans.append(plan_profile_send(p, now, *classified[p["name"]], force=force, detail=force, label=label))
+            if preview:
+                plans.append(plan_profile_send(p, now, *classified[p["name"]], force=True, detail=True,
+                                               channel=False, label=label))
+        # ✅ 관리자 리포트 — 본 채널과 동시에 발송
+        deliver_plans(plans)
+
+        # 기록은 한 트랜잭션으로: 본 채널 조각이 모두 전달된 프로필만 발송/시각 갱신 + 실행 기록
+        with get_store().transaction():
+            for plan in plans:
+                sent = commit_plan(plan)
+                if plan["channel"]:
+                    fold_plan(plan, sent)
+            finish_run()
+        return plans
+    finally:
+        finish_run()  # 예외로 빠져나온 경우에도 실행 기록은 남긴다
+
+def run_bot(now=None, buffers=None):
+    """
+    정시 발송 1회 (모든 프로필 — 같은 검색어는 한 번만 조회).
+    buffers({query: PrefetchBuffer})를 주면 워밍업 동안 받아 둔 기사에 증분 조회분만 합쳐서 바로 발송한다.
+    now 는 예정 시각 (스케줄러가 늦게 깨도 예정 시각 기준으로 판단)
+    """
+    now = now or datetime.now(KST)  # 테스트/벤치마크에서 실행 시각 지정 가능
+    print(f"\n🕒 실행: {now.strftime('%Y-%m-%d %H:%M:%S')} KST")
+
+    # ✅ 발송 시각(SEND_CRON, 기본 짝수시 정시)만 발송
+    if not get_send_schedule().matches(now):
+        print("⏸️ 발송 타임이 아님 → 스킵")
+        return
+    run_jobs(["send"], now, buffers)
+
+# ─────────────────────────────────────────────
+# 예약 실행 (scheduler) — 발송 / 미리 받기 / 미리보기 / 강제 발송
+# ─────────────────────────────────────────────
+_send_schedule = None
+_buffers = {}          # 미리 받기 버퍼 ({queries: PrefetchBuffer}) — 다음 발송 한 번이 쓴다
+_buffers_target = None  # 버퍼를 채우는 대상 발송 시각
+
+def get_send_schedule():
+    """SEND_CRON 파싱은 처음 쓸 때 (식이 잘못돼도 import 하는 다른 스크립트는 그대로 동작)"""
+    global _send_schedule
+    if _send_schedule is None:
+        _send_schedule = CronSchedule(SEND_CRON or "0 */2 * * *")
+    return _send_schedule
+
+def prefetch(scheduled):
+    """정시 전 워밍업 1회: 검색어별 증분 조회해서 다음 발송 시각용 버퍼에 쌓는다"""
+    global _buffers_target
+    target = get_send_schedule().next_after(scheduled)
+    if target != _buffers_target:
+        _buffers.clear()   # 지난 회차 발송이 건너뛰어져 남은 버퍼
+        _buffers_target = target
+    begin_run("prefetch")
+    try:
+        profiles = get_profiles()
+        fetch_shared(group_by_query(profiles, get_keyword_snapshot(profiles).get_keywords), _buffers)
+    except Exception as e:
+        print("⚠️ 미리 받기 예외:", e)
+    finally:
+        finish_run()
+
+def scheduled_jobs():
+    """설정된 cron 식 → 작업 목록 (빈 식은 끔)"""
+    specs = [
+        ("prefetch", PREFETCH_CRON, PREFETCH_GRACE),
+        ("send", SEND_CRON, MISFIRE_GRACE),
+        ("preview", PREVIEW_CRON, MISFIRE_GRACE),
+        ("force_send", FORCE_SEND_CRON, MISFIRE_GRACE),
+        ("digest", DIGEST_CRON, DIGEST_GRACE),
+    ]
+    return [make_job(name, cron, grace) for name, cron, grace in specs if cron]
+
+def run_scheduled(batch):
+    """
+    스케줄러 runner: 같은 깨어남에 겹친 작업 묶음을 실행.
+    발송 / 미리보기 / 강제 발송은 run_jobs 한 번으로 (조회·분류 공유, 메시지 동시 발송)
+    """
+    fired = {job["name"]: at for job, at in batch}
+    if "prefetch" in fired:
+        prefetch(fired["prefetch"])
+    if "digest" in fired:
+        try:
+            send_digests(days=1, until=fired["digest"])
         except Exception as e:
-            print("❌ 루프 예외 발생:", e)
-            time.sleep(60)
+            print("⚠️ 다이제스트 예외:", e)
+    kinds = [k for k in JOB_KINDS if k in fired]
+    if not kinds:
+        return
+    now = fired.get("send") or max(fired[k] for k in kinds)
+    print(f"\n🕒 실행: {now.strftime('%Y-%m-%d %H:%M:%S')} KST [{', '.join(kinds)}]")
+    try:
+        run_jobs(kinds, now, _buffers if "send" in fired else None)
+    finally:
+        if "send" in fired:
+            _buffers.clear()
 
-        finally:
-            clear_lock()
-            time.sleep(10)
+# ─────────────────────────────────────────────
+# 상주 실행 (Render worker)
+# ─────────────────────────────────────────────
+if __name__ == "__main__":
+    init_process()
+    lock = ProcessLock(LOCK_FILE)
+    if not lock.acquire():
+        holder = lock.holder()
+        age = holder.get("age")
+        print(f"⚠️ 이미 실행 중인 프로세스 감지 (pid {holder.get('pid', '?')}"
+              + (f", 하트비트 {age:.0f}초 전" if age is not None else "") + ") → 종료")
+        if age is not None and age > HEARTBEAT_STALE:
+            print("⚠️ 락을 잡은 프로세스의 하트비트가 멈춤 — 프로세스 상태 확인 필요")
+        sys.exit(0)
+
+    try:
+        jobs = scheduled_jobs()
+        print("🚀 fcanews bot 시작 — " + " / ".join(f"{j['name']} '{j['schedule'].expr}'" for j in jobs))
+        Scheduler(jobs, run_scheduled, store=get_store(), clock=lambda: datetime.now(KST)).run_forever()
+    finally:
+        lock.release()
@@ -0,0 +1,167 @@
+# ===============================================
+# metrics.py — 실행 단계 계측 / 네이버 일일 호출 수 / JSONL·Prometheus 기록
+# ===============================================
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+NAVER_DAILY_QUOTA = int(os.getenv("NAVER_DAILY_QUOTA", "25000"))   # 검색 API 일일 한도
+QUOTA_WARN_RATIO = 0.9
+METRICS_MAX_BYTES = 2 * 1024 * 1024   # JSONL 이 넘으면 .1 로 돌리고 새로 씀
+HISTORY_RUNS = 50                     # p50/p95 계산에 쓰는 최근 실행 수 (StateStore.recent_runs)
+
+class RunMetrics:
+    """실행 1회의 단계별 기록 (스레드 안전: 미리 받는 페이지 요청이 다른 스레드에서 기록)"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.time()
+        self.events = []
+        self.finished = False
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name, **fields):
+        """with metrics.phase("send") as rec: rec["status"] = ...  → 소요 시간과 함께 기록"""
+        rec = {"phase": name, **fields}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["duration_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            self.add(rec)
+
+    def add(self, rec):
+        with self.lock:
+            self.events.append(rec)
+
+    def record(self, name, duration_ms, **fields):
+        self.add({"phase": name, "duration_ms": round(duration_ms, 2), **fields})
+
+    def count(self, name):
+        with self.lock:
+            return sum(1 for e in self.events if e["phase"] == name)
+
+    def to_dict(self):
+        with self.lock:
+            events = list(self.events)
+        return {
+            "kind": self.kind,
+            "started": datetime.fromtimestamp(self.started, KST).isoformat(),
+            "total_ms": round((time.time() - self.started) * 1000, 2),
+            "events": events,
+        }
+
+class CallCounter:
+    """
+    네이버 일일 호출 수 (KST 날짜 기준) — StateStore.counters["naver_calls"]
+    실행 중에는 메모리에서 더하고, flush() 때 저장소 값에 원자적으로 더한다 (다른 프로세스 호출 보존).
+    """
+
+    def __init__(self, store, quota=NAVER_DAILY_QUOTA):
+        self.store = store
+        self.quota = quota
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.day = self._today()
+
+    def _today(self):
+        return datetime.now(KST).strftime("%Y-%m-%d")
+
+    def add(self, n=1):
+        with self.lock:
+            self.pending += n
+
+    def today(self):
+        with self.lock:
+            pending = self.pending if self.day == self._today() else 0
+        return self.store.get_counter("naver_calls", self._today()) + pending
+
+    def remaining(self):
+        return self.quota - self.today()
+
+    def exceeded(self):
+        return self.today() >= self.quota
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, 0
+            self.day = self._today()
+        if pending:
+            self.store.incr_counter("naver_calls", self.day, pending)
+        saved = self.today()
+        if saved >= self.quota * QUOTA_WARN_RATIO:
+            print(f"⚠️ 네이버 일일 호출 {saved}/{self.quota} — 한도 임박")
+
+def _atomic_write(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def append_jsonl(path, record, max_bytes=METRICS_MAX_BYTES):
+    """롤링 JSONL: 크기 초과 시 path.1 로 한 번 돌린 뒤 이어 쓴다."""
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+            os.replace(path, f"{path}.1")
+    except OSError:
+        pass
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))
+    return values[idx]
+
+def phase_percentiles(runs):
+    """실행 기록 → {phase: (p50_ms, p95_ms, 표본 수)} (같은 실행 안의 같은 단계는 합산)"""
+    per_phase = {}
+    for run in runs:
+        totals = {}
+        for e in run.get("events", []):
+            totals[e["phase"]] = totals.get(e["phase"], 0) + e.get("duration_ms", 0)
+        for name, ms in totals.items():
+            per_phase.setdefault(name, []).append(ms)
+    return {
+        name: (_percentile(v, 0.5), _percentile(v, 0.95), len(v))
+        for name, v in per_phase.items()
+    }
+
+def write_prometheus(path, run, counter, percentiles):
+    """node_exporter textfile 수집기 형식으로 덮어쓴다."""
+    lines = [
+        "# HELP fcanews_naver_calls_today Naver search API calls today (KST).",
+        "# TYPE fcanews_naver_calls_today gauge",
+        f"fcanews_naver_calls_today {counter.today()}",
+        "# HELP fcanews_naver_daily_quota Naver search API daily quota.",
+        "# TYPE fcanews_naver_daily_quota gauge",
+        f"fcanews_naver_daily_quota {counter.quota}",
+        "# HELP fcanews_last_run_duration_ms Duration of the last run.",
+        "# TYPE fcanews_last_run_duration_ms gauge",
+        f'fcanews_last_run_duration_ms{{kind="{run["kind"]}"}} {run["total_ms"]}',
+        "# HELP fcanews_last_run_timestamp_seconds Start time of the last run.",
+        "# TYPE fcanews_last_run_timestamp_seconds gauge",
+        f'fcanews_last_run_timestamp_seconds{{kind="{run["kind"]}"}} {int(datetime.fromisoformat(run["started"]).timestamp())}',
+        "# HELP fcanews_phase_duration_ms Phase duration percentiles over recent runs.",
+        "# TYPE fcanews_phase_duration_ms gauge",
+    ]
+    for name, (p50, p95, _) in sorted(percentiles.items()):
+        lines.append(f'fcanews_phase_duration_ms{{phase="{name}",quantile="0.5"}} {p50}')
+        lines.append(f'fcanews_phase_duration_ms{{phase="{name}",quantile="0.95"}} {p95}')
+    _atomic_write(path, "\n".join(lines) + "\n")
+
+def format_percentiles(percentiles, phases):
+    """관리자 리포트용 한 줄: naver 120/340ms · send 80/150ms (p50/p95)"""
+    parts = []
+    for name in phases:
+        if name in percentiles:
+            p50, p95, _ = percentiles[name]
+            parts.append(f"{name} {p50:.0f}/{p95:.0f}ms")
+    return " · ".join(parts)
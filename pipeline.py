@@ -0,0 +1,333 @@
+# ===============================================
+# pipeline.py — 수집 파이프라인 (생성기 단계 조합)
+# ===============================================
+# 페이지 → 항목 → 정규화 → watermark → 중복 → 매칭(제목+요약) → (본문) → sink
+# - 흐름에는 기사 dict 와 PageEnd(페이지 끝 표시)가 섞여 흐른다. 단계 = stream → stream 생성기 함수.
+# - item_stage 로 만든 단계는 PageEnd 를 그대로 넘기므로, 새 단계(묶기·점수 등)는 기사만 신경 쓰면 된다.
+# - 하류가 멈추면(return/close) 상류 생성기가 닫히면서 미리 요청해 둔 페이지도 취소된다.
+#   PageEnd 는 다음 페이지를 요청하기 전에 흘러나오므로, 종료 규칙은 여분 호출 없이 페이지 단위로 끊는다.
+# - 기사마다 "call_no" 가 붙어 있어 단계별 카운터(PageCounters)가 페이지 단위로 쌓인다 → loop_reports
+import html
+import time
+from datetime import timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from dedup import article_keys
+
+KST = timezone(timedelta(hours=9))
+
+# 기사 분류 상태 (한 번의 조회 결과를 모든 리포트가 공유)
+STATUS_STALE = "stale"                 # last_checked 이전 기사
+STATUS_DUPLICATE = "duplicate"         # 이미 발송한 링크 (재색인/날짜 변경 기사)
+STATUS_INCLUDE_FAIL = "include_fail"   # 포함 필터 미통과
+STATUS_EXCLUDE_HIT = "exclude_hit"     # 포함 통과 후 제외 필터 히트
+STATUS_PASSED = "passed"               # 최종 통과
+
+class PageEnd:
+    """
+    페이지 하나가 끝났다는 표시 (display = 그 페이지 요청 건수)
+    fetch = 요청 판단 내역 (fetch_guard: 재시도 / 헤지 / 오류) — error 가 있으면 실패한 빈 페이지
+    """
+    __slots__ = ("call_no", "query", "fetched", "display", "fetch")
+
+    def __init__(self, call_no, query, fetched, display=None, fetch=None):
+        self.call_no = call_no
+        self.query = query
+        self.fetched = fetched
+        self.display = display if display is not None else fetched
+        self.fetch = fetch
+
+class PageCounters:
+    """
+    페이지(call_no)별 단계 카운터 / 소요 시간.
+    PageEnd 를 본 페이지만 loop_reports 에 들어간다 (끝까지 처리된 페이지).
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.ended = []
+
+    def _page(self, call_no):
+        page = self.pages.get(call_no)
+        if page is None:
+            page = self.pages[call_no] = {"counts": {}, "ms": {}, "query": None, "fetched": 0, "fetch": {}}
+        return page
+
+    def count(self, call_no, name, n=1):
+        counts = self._page(call_no)["counts"]
+        counts[name] = counts.get(name, 0) + n
+
+    def add_time(self, call_no, name, seconds):
+        ms = self._page(call_no)["ms"]
+        ms[name] = ms.get(name, 0.0) + seconds * 1000
+
+    def end(self, marker):
+        page = self._page(marker.call_no)
+        page["query"] = marker.query
+        page["fetched"] = marker.fetched
+        page["fetch"] = marker.fetch or {}
+        if marker.call_no not in self.ended:
+            self.ended.append(marker.call_no)
+
+    def get(self, call_no, name):
+        return self.pages.get(call_no, {}).get("counts", {}).get(name, 0)
+
+    def timings(self, name):
+        """[(call_no, ms)] — 끝난 페이지 순서"""
+        return [(n, self.pages[n]["ms"].get(name, 0.0)) for n in self.ended]
+
+    def loop_reports(self):
+        reports = []
+        for n in self.ended:
+            time_filtered = self.get(n, "time_filtered")
+            duplicate_hit = self.get(n, "duplicate_hit")
+            title_include_fail = self.get(n, "title_include_fail")
+            fetch = self.pages[n]["fetch"]
+            reports.append({
+                "call_no": n,
+                "body_rescued": self.get(n, "body_rescued"),
+                "query": self.pages[n]["query"],
+                "fetched": self.pages[n]["fetched"],
+                "time_filtered": time_filtered,
+                "duplicate_hit": duplicate_hit,
+                "title_include_fail": title_include_fail,
+                # 포함 통과 수(제외 포함, 본문으로 통과한 것 포함): 최신 처리된 것 중 중복·포함 실패를 뺀 값
+                "title_include_pass": max(0, time_filtered - duplicate_hit - title_include_fail),
+                "title_exclude_hit": self.get(n, "title_exclude_hit"),
+                "retries": fetch.get("retries", 0),
+                "hedged": fetch.get("hedged", 0),
+                "error": fetch.get("error"),
+                "capped": fetch.get("capped", False),
+            })
+        return reports
+
+# ─────────────────────────────────────────────
+# 조합 도구
+# ─────────────────────────────────────────────
+def compose(source, *stages):
+    """source 에 단계를 차례로 씌운 stream"""
+    stream = source
+    for stage in stages:
+        stream = stage(stream)
+    return stream
+
+def item_stage(fn):
+    """fn(기사) → 기사 또는 None(버림) 을, PageEnd 는 그대로 넘기는 단계로 만든다."""
+    def stage(stream):
+        for x in stream:
+            if isinstance(x, PageEnd):
+                yield x
+                continue
+            out = fn(x)
+            if out is not None:
+                yield out
+    return stage
+
+def replay_pages(pages):
+    """저장해 둔 페이지 목록(공유 조회 / 미리 받기)을 다시 흐름으로 (번호가 바뀐 페이지는 기사 call_no 도 맞춘다)"""
+    for page in pages:
+        n = page["call_no"]
+        for a in page["items"]:
+            yield a if a.get("call_no") == n else {**a, "call_no": n}
+        yield PageEnd(n, page.get("query"), page["fetched"], page.get("display"), page.get("fetch"))
+
+def iter_pages(stream):
+    """흐름 → 페이지 단위 {"call_no", "query", "fetched", "display", "fetch", "items"} (PageEnd 마다 하나, 지연 평가 유지)"""
+    items = []
+    for x in stream:
+        if isinstance(x, PageEnd):
+            yield {"call_no": x.call_no, "query": x.query, "fetched": x.fetched, "display": x.display,
+                   "fetch": x.fetch, "items": items}
+            items = []
+        else:
+            items.append(x)
+
+def collect(stream, counters):
+    """sink: 기사 목록으로 모으고 페이지 끝을 카운터에 기록"""
+    articles = []
+    for x in stream:
+        if isinstance(x, PageEnd):
+            counters.end(x)
+        else:
+            articles.append(x)
+    return articles
+
+# ─────────────────────────────────────────────
+# 단계
+# ─────────────────────────────────────────────
+def _plain(text):
+    return html.unescape(text or "").replace("<b>", "").replace("</b>", "")
+
+def normalize_item(item):
+    """API 응답 항목(+call_no) → 기사 dict (분류 전). pubDate 가 없거나 읽을 수 없으면 None"""
+    pub_raw = item.get("pubDate")
+    if not pub_raw:
+        return None
+    try:
+        pub_dt = parsedate_to_datetime(pub_raw).astimezone(KST)
+    except Exception:
+        return None
+    return {
+        "call_no": item.get("call_no"),
+        "title": _plain(item.get("title", "")),
+        "description": _plain(item.get("description", "")),
+        "link": (item.get("link") or "").strip(),
+        "originallink": (item.get("originallink") or "").strip(),
+        "keys": article_keys(item),
+        "pub_dt": pub_dt,
+    }
+
+def normalize(counters):
+    """원본 항목 → 기사 dict"""
+    def fn(item):
+        t0 = time.perf_counter()
+        article = normalize_item(item)
+        counters.add_time(item.get("call_no"), "parse", time.perf_counter() - t0)
+        return article
+    return item_stage(fn)
+
+def stop_at(since, log=True):
+    """
+    페이지 단위 종료 규칙: 요청이 실패한 페이지, since 이하 기사가 나온 페이지, 또는 신규가 그 페이지
+    요청 건수(display) 미만인 페이지의 PageEnd 를 넘긴 뒤 멈춘다 → 상류는 다음 페이지를 요청하지 않는다.
+    """
+    def stage(stream):
+        fresh = stale = 0
+        for x in stream:
+            yield x
+            if isinstance(x, PageEnd):
+                if x.fetch and x.fetch.get("error"):
+                    if log:
+                        print(f"⏹️ {x.call_no}차 요청 실패 → 루프 종료")
+                    return
+                if stale:
+                    if log:
+                        print(f"⏹️ {x.call_no}차에서 이전 기사 등장 → 루프 종료")
+                    return
+                if fresh < x.display:
+                    if log:
+                        print(f"⏹️ {x.call_no}차에서 신규 기사 부족({fresh}/{x.display}) → 루프 종료")
+                    return
+                fresh = stale = 0
+            elif since and x["pub_dt"] <= since:
+                stale += 1
+            else:
+                fresh += 1
+    return stage
+
+def match_fields(matcher, *texts):
+    """여러 필드(제목, 요약 …)를 필드마다 한 번씩 스캔해 히트를 합친다 (필드 경계를 넘는 매칭 없음)"""
+    include_hits, exclude_hits = [], []
+    for text in texts:
+        if not text:
+            continue
+        inc, exc = matcher.match(text)
+        include_hits += [k for k in inc if k not in include_hits]
+        exclude_hits += [k for k in exc if k not in exclude_hits]
+    return include_hits, exclude_hits
+
+def classify_title(title, matcher, description=""):
+    """
+    제목(+요약 description)에 포함 → 제외 규칙을 적용 (시간 필터 제외, 필드마다 한 번만 스캔)
+    반환: status, include_hits, exclude_hits
+    """
+    include_hits, exclude_hits = match_fields(matcher, title, description)
+    # 1) 포함(통과) 필터: 비어 있으면 통과, 있으면 하나라도 포함해야 통과
+    if matcher.include_keywords and not include_hits:
+        return STATUS_INCLUDE_FAIL, include_hits, exclude_hits
+    # 2) 제외 필터: 하나라도 걸리면 즉시 제외
+    if exclude_hits:
+        return STATUS_EXCLUDE_HIT, include_hits, exclude_hits
+    # 3) 최종 통과
+    return STATUS_PASSED, include_hits, exclude_hits
+
+def mark_stale(last_checked, counters):
+    """시간 필터: last_checked 이하는 stale, 나머지는 분류 대기(status None)로 새 dict 를 만든다."""
+    def fn(article):
+        a = {**article, "status": None, "include_hits": [], "exclude_hits": []}
+        if last_checked and a["pub_dt"] <= last_checked:
+            a["status"] = STATUS_STALE
+        else:
+            counters.count(a["call_no"], "time_filtered")
+        return a
+    return item_stage(fn)
+
+def mark_duplicates(sent_index, counters):
+    """발송 기록에 있는 링크 → duplicate"""
+    def fn(a):
+        if a["status"] is None:
+            t0 = time.perf_counter()
+            if sent_index.seen(a["keys"]):
+                a["status"] = STATUS_DUPLICATE
+                counters.count(a["call_no"], "duplicate_hit")
+            counters.add_time(a["call_no"], "filter", time.perf_counter() - t0)
+        return a
+    return item_stage(fn)
+
+def match_titles(matcher, counters):
+    """포함 → 제외 필터 — 제목과 요약 (status 가 아직 없는 기사만)"""
+    def fn(a):
+        if a["status"] is None:
+            t0 = time.perf_counter()
+            a["status"], a["include_hits"], a["exclude_hits"] = classify_title(
+                a["title"], matcher, a.get("description", ""))
+            if a["status"] == STATUS_INCLUDE_FAIL:
+                counters.count(a["call_no"], "title_include_fail")
+            elif a["status"] == STATUS_EXCLUDE_HIT:
+                counters.count(a["call_no"], "title_exclude_hit")
+            counters.add_time(a["call_no"], "filter", time.perf_counter() - t0)
+        return a
+    return item_stage(fn)
+
+def rescue_by_body(fetcher, matcher, counters):
+    """
+    제목·요약으로 포함 필터를 못 넘은 기사만 본문(originallink, 없으면 link)으로 다시 본다.
+    페이지 단위로 모아서 fetcher.texts() 한 번에 동시 요청 → 본문에 포함 키워드가 있으면
+    (제목·요약 제외 히트가 있으면 exclude_hit, 없으면 passed). 본문의 제외 키워드는 보지 않는다.
+    """
+    def rescue(batch):
+        candidates = [a for a in batch if a["status"] == STATUS_INCLUDE_FAIL]
+        if not candidates:
+            return
+        texts = fetcher.texts([a["originallink"] or a["link"] for a in candidates])
+        for a in candidates:
+            text = texts.get(a["originallink"] or a["link"])
+            if not text:
+                continue
+            include_hits, _ = matcher.match(text)
+            if not include_hits:
+                continue
+            a["include_hits"] = include_hits
+            a["status"] = STATUS_EXCLUDE_HIT if a["exclude_hits"] else STATUS_PASSED
+            counters.count(a["call_no"], "title_include_fail", -1)
+            counters.count(a["call_no"], "body_rescued")
+            if a["exclude_hits"]:
+                counters.count(a["call_no"], "title_exclude_hit")
+
+    def stage(stream):
+        batch = []
+        for x in stream:
+            if isinstance(x, PageEnd):
+                rescue(batch)
+                yield from batch
+                yield x
+                batch = []
+            else:
+                batch.append(x)
+        rescue(batch)
+        yield from batch
+    return stage
+
+def classify_stages(matcher, sent_index, last_checked, counters, stop=None, extra=(), fetcher=None):
+    """
+    분류 단계 묶음: 시간 → (종료 규칙) → 중복 → 포함/제외 → (본문) → extra(추가 단계)
+    stop 은 stop_at(...) 단계 (None 이면 들어온 페이지를 모두 처리)
+    fetcher(article_fetch.ArticleFetcher)를 주면 포함 실패 기사를 본문으로 한 번 더 본다
+    """
+    stages = [mark_stale(last_checked, counters)]
+    if stop is not None:
+        stages.append(stop)
+    stages += [mark_duplicates(sent_index, counters), match_titles(matcher, counters)]
+    if fetcher is not None and matcher.include_keywords:
+        stages.append(rescue_by_body(fetcher, matcher, counters))
+    return stages + list(extra)
@@ -0,0 +1,89 @@
+# ===============================================
+# planner.py — 조회 계획: 시간대별 기사 유입률 학습 → display / 페이지 수 / 일일 호출 예산
+# ===============================================
+# 지난 조회에서 last_checked 이후로 들어온 기사 수를 시간대(0~23시)별로 쌓아 두고,
+# 이번 구간(last_checked ~ 지금)에 들어왔을 기사 수를 예상해서 보통 1회 호출로 끝나게 display 를 고른다.
+# 예상보다 많으면(마지막 페이지까지 전부 신규) 기존 규칙대로 다음 페이지로 이어 간다.
+import json
+import math
+from datetime import timedelta
+
+DISPLAY_MIN = 10
+DISPLAY_MAX = 100              # 네이버 검색 API 한 번에 받을 수 있는 최대 건수
+DISPLAY_STEP = 10
+SAFETY = 1.2                   # 예상 기사 수 여유 배수 (모자라면 다음 페이지로 이어 가므로 크게 잡지 않음)
+DEFAULT_RATE_PER_HOUR = 15.0   # 학습 전(관측 없는 시간대) 가정 유입률
+PRIOR_HOURS = 0.5              # 기본값을 관측 몇 시간어치로 섞을지 (관측이 쌓일수록 영향 감소)
+RATE_DECAY = 0.8               # 관측마다 이전 누적치에 곱하는 감쇠 (최근 관측 가중)
+COLD_ITEMS = 150               # last_checked 가 없을 때(첫 실행) 받을 기사 수 = 기존 30 × 5
+MAX_WINDOW_HOURS = 48          # 학습/예상에 쓰는 최대 구간
+
+def _hour_slices(since, now):
+    """[since, now] 구간을 시각 경계로 잘라 (시간대 0~23, 겹치는 시간) 목록으로"""
+    since = max(since, now - timedelta(hours=MAX_WINDOW_HOURS))
+    slices = []
+    t = since
+    while t < now:
+        boundary = t.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        end = min(boundary, now)
+        slices.append((t.hour, (end - t).total_seconds() / 3600))
+        t = end
+    return slices
+
+class ArrivalModel:
+    """
+    쿼리 하나의 시간대별 (기사 수, 관측 시간) 누적 — StateStore kv "arrivals|{query}" 에 JSON 으로 저장.
+    유입률 = (기사 수 + 기본값 × PRIOR_HOURS) / (관측 시간 + PRIOR_HOURS)
+    """
+
+    def __init__(self, store, query):
+        self.store = store
+        self.key = f"arrivals|{query}"
+        try:
+            data = json.loads(store.get(self.key) or "{}")
+        except ValueError:
+            data = {}
+        self.articles = data.get("articles") or [0.0] * 24
+        self.hours = data.get("hours") or [0.0] * 24
+
+    def rate(self, hour):
+        return (self.articles[hour] + DEFAULT_RATE_PER_HOUR * PRIOR_HOURS) / (self.hours[hour] + PRIOR_HOURS)
+
+    def expected(self, since, now):
+        return sum(self.rate(h) * span for h, span in _hour_slices(since, now))
+
+    def observe(self, since, now, pubs):
+        """since 이후 기사 pubDate 목록을 구간 전체를 다 본 조회 결과로 반영"""
+        counts = [0] * 24
+        for pub in pubs:
+            counts[pub.hour] += 1
+        for h, span in _hour_slices(since, now):
+            # 한 구간에 같은 시간대가 두 번 나오면(24시간 초과) 시간만 더해지고 기사 수는 한 번만 들어간다
+            self.articles[h] = self.articles[h] * RATE_DECAY + counts[h]
+            self.hours[h] = self.hours[h] * RATE_DECAY + span
+            counts[h] = 0
+        self.store.set(self.key, json.dumps({"articles": self.articles, "hours": self.hours}))
+
+def make_plan(model, since, now, remaining_calls, max_loops):
+    """
+    이번 조회 계획:
+    - pages: 예상 기사 수 × SAFETY 를 DISPLAY_MAX 로 나눈 계획 페이지 수 (미리 병렬 요청하는 범위)
+    - display: 계획 페이지에 고르게 나눈 건수를 DISPLAY_STEP 단위로 올림 (DISPLAY_MIN ~ DISPLAY_MAX)
+    - max_pages: 예상보다 많을 때 이어 갈 수 있는 상한 (max_loops, 남은 호출 예산)
+    반환: {"display", "pages", "max_pages", "expected"}
+    """
+    if since is None:
+        expected = COLD_ITEMS
+    else:
+        expected = model.expected(since, now)
+    need = max(1, math.ceil(expected * SAFETY)) if since is not None else COLD_ITEMS
+    pages = max(1, math.ceil(need / DISPLAY_MAX))
+    display = min(DISPLAY_MAX, max(DISPLAY_MIN, math.ceil(need / pages / DISPLAY_STEP) * DISPLAY_STEP))
+    max_pages = pages if since is None else max_loops   # 첫 실행은 기존과 같은 건수까지만
+    max_pages = max(0, min(max_pages, remaining_calls))
+    return {
+        "display": display,
+        "pages": min(pages, max_pages),
+        "max_pages": max_pages,
+        "expected": round(expected, 1),
+    }
@@ -0,0 +1,102 @@
+# ===============================================
+# profiles.py — 프로필(구단/리그별 키워드·채널·발송 조건) 목록
+# ===============================================
+# profiles.json 이 없으면 기존 설정(키워드 파일 3개 + TELEGRAM_CHAT_ID) 하나로 동작한다.
+# 형식은 profiles.example.json 참고. "$ENV_NAME" 값은 환경변수에서 읽는다.
+import json
+import os
+
+DEFAULT_PROFILE_NAME = "default"
+SEARCH_MODES = ("and", "or")   # and: 검색어 전체를 한 쿼리로 / or: 줄마다 따로 조회해서 병합
+
+def _resolve(value):
+    if isinstance(value, str) and value.startswith("$"):
+        return os.getenv(value[1:])
+    return value
+
+def make_profile(name, search_keywords_file, filter_keywords_file, exclude_keywords_file,
+                 chat_id, admin_chat_id, min_send_threshold, force_hours, search_mode="and",
+                 top_k=0, outlet_weights_file=None):
+    """
+    프로필 dict. scope 는 상태 저장소 키 구분용 — 기본 프로필은 "" 라서 기존 기록을 그대로 쓴다.
+    top_k = 본 채널에 보낼 최대 묶음 수 (점수순, 0 이면 제한 없음), 나머지는 관리자 리포트로
+    """
+    if search_mode not in SEARCH_MODES:
+        print(f"⚠️ [{name}] 알 수 없는 search_mode '{search_mode}' → and")
+        search_mode = "and"
+    return {
+        "name": name,
+        "scope": "" if name == DEFAULT_PROFILE_NAME else name,
+        "search_keywords_file": search_keywords_file,
+        "filter_keywords_file": filter_keywords_file,
+        "exclude_keywords_file": exclude_keywords_file,
+        "chat_id": _resolve(chat_id),
+        "admin_chat_id": _resolve(admin_chat_id),
+        "min_send_threshold": int(min_send_threshold),
+        "force_hours": set(force_hours),
+        "search_mode": search_mode,
+        "top_k": int(top_k),
+        "outlet_weights_file": outlet_weights_file,
+    }
+
+def load_profiles(path, default):
+    """
+    path(JSON 목록)를 읽어 프로필 목록을 만든다. 빠진 항목은 default 프로필 값으로 채운다.
+    파일이 없거나 비어 있으면 [default].
+    """
+    if not path or not os.path.exists(path):
+        return [default]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except Exception as e:
+        print(f"⚠️ 프로필 파일 로드 예외 ({path}):", e)
+        return [default]
+
+    profiles, names = [], set()
+    for entry in raw or []:
+        name = entry.get("name")
+        if not name or name in names:
+            print(f"⚠️ 프로필 이름 누락/중복 → 건너뜀: {name}")
+            continue
+        names.add(name)
+        profiles.append(make_profile(
+            name,
+            entry.get("search_keywords_file", default["search_keywords_file"]),
+            entry.get("filter_keywords_file", default["filter_keywords_file"]),
+            entry.get("exclude_keywords_file", default["exclude_keywords_file"]),
+            entry.get("chat_id", default["chat_id"]),
+            entry.get("admin_chat_id", default["admin_chat_id"]),
+            entry.get("min_send_threshold", default["min_send_threshold"]),
+            entry.get("force_hours", default["force_hours"]),
+            entry.get("search_mode", default["search_mode"]),
+            entry.get("top_k", default["top_k"]),
+            entry.get("outlet_weights_file", default["outlet_weights_file"]),
+        ))
+    return profiles or [default]
+
+def scoped_key(key, profile):
+    """저장소 키를 프로필 범위로: 기본 프로필은 그대로, 나머지는 "이름|키" """
+    scope = profile["scope"] if profile else ""
+    return f"{scope}|{key}" if scope else key
+
+def search_queries(keywords, mode):
+    """
+    검색어 파일 줄 목록 → 네이버 쿼리 목록
+    - and: 한 줄로 이어 붙인 쿼리 하나 (기존 방식)
+    - or: 줄마다 쿼리 하나 (한 줄 안에 여러 단어를 쓰면 그 묶음은 함께 검색), 중복 줄 제거
+    """
+    if mode == "or":
+        return tuple(dict.fromkeys(keywords))
+    return (" ".join(keywords),)
+
+def group_by_query(profiles, load_keywords):
+    """
+    같은 쿼리 목록(search_queries)을 쓰는 프로필끼리 묶는다.
+    반환: {(query, ...): [profile, ...]} (처음 등장 순서 유지)
+    """
+    groups = {}
+    for p in profiles:
+        queries = search_queries(load_keywords(p["search_keywords_file"]), p["search_mode"])
+        groups.setdefault(queries, []).append(p)
+    return groups
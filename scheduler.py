@@ -0,0 +1,252 @@
+# ===============================================
+# scheduler.py — cron 형식 스케줄 / 놓친 실행 유예·따라잡기 / fcntl 프로세스 락(하트비트)
+# ===============================================
+# - CronSchedule("0 */2 * * *"): 분 시 일 월 요일 (*, */n, a-b, a-b/n, 쉼표 목록 / 요일 0·7 = 일요일)
+# - Scheduler: 작업마다 마지막으로 처리한 실행 시각을 StateStore kv 에 남기고,
+#   깰 때마다 (마지막 처리, 지금] 사이의 실행 시각을 본다
+#   → 유예(grace) 안이면 늦게라도 가장 최근 1회만 실행(여러 번 놓쳤어도 1회), 지났으면 건너뜀
+#   → 같은 시각에 겹친 작업은 runner 에 한 묶음으로 넘긴다 (조회 공유는 runner 몫)
+# - 잠은 MAX_SLEEP 씩 끊어서 잔다: 일시 정지(suspend) 동안은 monotonic 시계가 멈추므로
+#   긴 sleep 한 번이면 깨어난 뒤에도 남은 시간을 더 자게 된다
+# - ProcessLock: fcntl.flock 배타 락 (프로세스가 죽으면 커널이 풀어 줌 — mtime 만료 추정 없음),
+#   락 파일에 pid / 하트비트 시각을 주기적으로 써서 다른 프로세스가 상태를 볼 수 있게
+import fcntl
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+MAX_SLEEP = 60              # 초, 한 번에 자는 최대 시간 (벽시계 점프 / 일시 정지 감지 주기)
+SUSPEND_DRIFT = 5           # 초, 벽시계가 monotonic 보다 이만큼 더 가면 일시 정지로 본다
+LATE_NOTICE = 5             # 초, 이보다 늦게 시작하면 지연 로그
+MAX_LOOKBACK = timedelta(days=1)   # 놓친 실행을 세는 최대 범위
+HEARTBEAT_INTERVAL = 30     # 초
+HEARTBEAT_STALE = 600       # 초, 락은 잡혀 있는데 하트비트가 이보다 오래되면 멈춘 프로세스로 경고
+
+_FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7)]
+
+def _parse_field(text, lo, hi):
+    values = set()
+    for part in text.split(","):
+        rng, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if rng == "*":
+            a, b = lo, hi
+        elif "-" in rng:
+            a, b = (int(x) for x in rng.split("-", 1))
+        else:
+            a = b = int(rng)
+            if step > 1:
+                b = hi
+        if step < 1 or a < lo or b > hi or a > b:
+            raise ValueError(f"cron 범위 오류: {text}")
+        values.update(range(a, b + 1, step))
+    return values
+
+class CronSchedule:
+    """5필드 cron 식 (분 단위). 시각은 tz 가 붙은 datetime 그대로 계산 (KST 는 서머타임 없음)"""
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 필드는 5개: {expr!r}")
+        self.expr = expr
+        parsed = {name: _parse_field(f, lo, hi) for f, (name, lo, hi) in zip(fields, _FIELDS)}
+        self.minutes, self.hours = parsed["minute"], parsed["hour"]
+        self.days, self.months = parsed["day"], parsed["month"]
+        self.weekdays = {d % 7 for d in parsed["weekday"]}   # 0 = 일요일
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_ok(self, dt):
+        day = dt.day in self.days
+        weekday = (dt.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday   # 일·요일 둘 다 지정하면 cron 처럼 둘 중 하나
+
+    def matches(self, dt):
+        return (dt.minute in self.minutes and dt.hour in self.hours
+                and dt.month in self.months and self._day_ok(dt))
+
+    def next_after(self, dt):
+        """dt 이후(같은 분 제외) 첫 실행 시각"""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(100000):
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_ok(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"다음 실행 시각 없음: {self.expr}")
+
+def make_job(name, cron, grace):
+    """작업 dict. grace = 예정 시각을 이 초만큼 넘겨서 깨도 실행 (넘으면 그 회차는 건너뜀)"""
+    return {"name": name, "schedule": CronSchedule(cron), "grace": grace}
+
+class Scheduler:
+    """
+    runner(batch) 를 부르는 루프. batch = [(job, 예정 시각)] (같은 깨어남에 실행할 작업 전부).
+    처리 기록은 runner 가 끝난 뒤 남긴다 — 실행 중 프로세스가 죽으면 재시작 후 유예 안에서 다시 따라잡는다.
+    """
+
+    def __init__(self, jobs, runner, store=None, clock=None):
+        self.jobs = jobs
+        self.runner = runner
+        self.store = store
+        self.clock = clock or (lambda: datetime.now().astimezone())
+        self.stop_event = threading.Event()
+        now = self.clock()
+        # 기록이 없으면(첫 실행) 유예 범위까지만 거슬러 본다
+        self.last = {job["name"]: self._load(job) or now - timedelta(seconds=job["grace"]) for job in jobs}
+
+    def _load(self, job):
+        if self.store is None:
+            return None
+        try:
+            value = self.store.get(f"schedule|{job['name']}")
+            return datetime.fromisoformat(value) if value else None
+        except Exception as e:
+            print(f"⚠️ [{job['name']}] 스케줄 기록 읽기 예외:", e)
+            return None
+
+    def _mark(self, job, fired):
+        self.last[job["name"]] = fired
+        if self.store is None:
+            return
+        try:
+            self.store.set(f"schedule|{job['name']}", fired.isoformat())
+        except Exception as e:
+            print(f"⚠️ [{job['name']}] 스케줄 기록 예외:", e)
+
+    def due(self, now):
+        """(마지막 처리, now] 사이 실행 시각 → 실행할 (job, 예정 시각) 목록. 유예를 넘긴 회차는 처리한 것으로 기록"""
+        batch = []
+        for job in self.jobs:
+            t = job["schedule"].next_after(max(self.last[job["name"]], now - MAX_LOOKBACK))
+            fired, missed = None, 0
+            while t <= now:
+                fired, missed = t, missed + 1
+                t = job["schedule"].next_after(t)
+            if fired is None:
+                continue
+            late = (now - fired).total_seconds()
+            if late > job["grace"]:
+                print(f"⏭️ [{job['name']}] {fired.strftime('%m-%d %H:%M')} 실행 놓침 "
+                      f"({late:.0f}초 지남 > 유예 {job['grace']}초) → 건너뜀")
+                self._mark(job, fired)
+                continue
+            if missed > 1:
+                print(f"🔁 [{job['name']}] 놓친 실행 {missed}회 → 최근 {fired.strftime('%m-%d %H:%M')} 1회만 따라잡기")
+            elif late > LATE_NOTICE:
+                print(f"⏰ [{job['name']}] {fired.strftime('%H:%M')} 실행 {late:.0f}초 늦게 시작")
+            batch.append((job, fired))
+        return batch
+
+    def next_fire(self, now):
+        return min(job["schedule"].next_after(now) for job in self.jobs)
+
+    def run_pending(self, now=None):
+        """지금 실행할 작업을 한 번 처리. 반환: 실행한 묶음"""
+        batch = self.due(now or self.clock())
+        if not batch:
+            return batch
+        try:
+            self.runner(batch)
+        except Exception as e:
+            print("❌ 예약 작업 예외:", e)
+        finally:
+            for job, fired in batch:
+                self._mark(job, fired)
+        return batch
+
+    def run_forever(self):
+        announced = None
+        while not self.stop_event.is_set():
+            if self.run_pending():
+                continue   # 실행하는 동안 다음 시각이 지났을 수 있다
+            now = self.clock()
+            wake = self.next_fire(now)
+            if wake != announced:
+                names = ", ".join(j["name"] for j in self.jobs if j["schedule"].next_after(now) == wake)
+                wait_min = int((wake - now).total_seconds() / 60)
+                print(f"⏰ 다음 실행: {wake.strftime('%Y-%m-%d %H:%M')} [{names}] ({wait_min}분 후)")
+                announced = wake
+            wall, mono = time.time(), time.monotonic()
+            self.stop_event.wait(min(MAX_SLEEP, max(0.0, (wake - now).total_seconds())))
+            drift = (time.time() - wall) - (time.monotonic() - mono)
+            if drift > SUSPEND_DRIFT:
+                print(f"💤 일시 정지 감지 (약 {drift:.0f}초) → 놓친 작업 확인")
+
+    def stop(self):
+        self.stop_event.set()
+
+class ProcessLock:
+    """
+    fcntl 배타 락 + 하트비트. acquire() 가 False 면 다른 프로세스가 실행 중 (holder() 로 pid / 하트비트 확인).
+    락 파일은 지우지 않는다 (지우면 다른 프로세스가 새 파일에 락을 잡을 수 있음).
+    """
+
+    def __init__(self, path, interval=HEARTBEAT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.file = None
+        self.started = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def acquire(self):
+        f = open(self.path, "a+")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self.file = f
+        self.started = datetime.now().astimezone().isoformat()
+        self._beat()
+        self.thread = threading.Thread(target=self._run, name="lock-heartbeat", daemon=True)
+        self.thread.start()
+        return True
+
+    def _beat(self):
+        info = {"pid": os.getpid(), "started": self.started, "heartbeat": time.time()}
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(json.dumps(info))
+        self.file.flush()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self._beat()
+            except Exception as e:
+                print("⚠️ 락 하트비트 예외:", e)
+
+    def holder(self):
+        """락 파일 내용 {"pid", "started", "heartbeat", "age"} (읽을 수 없으면 빈 dict)"""
+        try:
+            with open(self.path) as f:
+                info = json.loads(f.read() or "{}")
+        except (OSError, ValueError):
+            return {}
+        if "heartbeat" in info:
+            info["age"] = time.time() - info["heartbeat"]
+        return info
+
+    def release(self):
+        self.stop_event.set()
+        if self.file is None:
+            return
+        try:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            self.file.close()
+        except Exception as e:
+            print("⚠️ 락 해제 예외:", e)
+        self.file = None
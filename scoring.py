@@ -0,0 +1,103 @@
+# ===============================================
+# scoring.py — 최종 통과 기사 관련도 점수 + 상위 K 선택 (바쁜 시간대 본 채널 줄 수 제한)
+# ===============================================
+# 점수 = 키워드 점수 × 언론사 가중치 × 최신도
+# - 키워드 점수: 포함 히트 키워드마다 가중치(filter_keywords.txt 의 "키워드 | 가중치", 기본 1)를 더한다
+#   제목 히트는 앞쪽일수록 최대 (1 + TITLE_POSITION_BONUS) 배, 요약에만 있으면 DESCRIPTION_FACTOR 배,
+#   본문에서만 찾았으면 BODY_FACTOR 배
+# - 언론사 가중치: outlet_weights.txt 의 "도메인 | 가중치" (originallink 호스트의 가장 긴 일치 접미사, 기본 1)
+# - 최신도: RECENCY_FLOOR + (1 - RECENCY_FLOOR) × 0.5^(경과 시간 / RECENCY_HALF_LIFE_HOURS)
+import heapq
+import os
+import urllib.parse
+
+from keyword_matcher import normalize_text, parse_weighted
+from pipeline import STATUS_PASSED, item_stage
+
+TITLE_POSITION_BONUS = 0.5
+DESCRIPTION_FACTOR = 0.4
+BODY_FACTOR = 0.25
+RECENCY_HALF_LIFE_HOURS = 6
+RECENCY_FLOOR = 0.5
+
+def load_outlet_weights(file_path):
+    """언론사 가중치 파일 → {도메인: 가중치} (없으면 빈 dict — 모두 1)"""
+    if not file_path or not os.path.exists(file_path):
+        return {}
+    weights = {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            domain, weight = parse_weighted(line.strip())
+            if domain:
+                weights[domain.lower()] = weight
+    return weights
+
+class Scorer:
+    """프로필 하나의 가중치로 기사 점수 계산 (now = 최신도 기준 시각)"""
+
+    def __init__(self, keyword_weights, outlet_weights, now):
+        self.keyword_weights = keyword_weights
+        self.outlet_weights = outlet_weights
+        self.now = now
+        self.normalized = {}
+
+    def _norm(self, keyword):
+        norm = self.normalized.get(keyword)
+        if norm is None:
+            norm = self.normalized[keyword] = normalize_text(keyword)
+        return norm
+
+    def outlet_weight(self, article):
+        host = urllib.parse.urlsplit(article.get("originallink") or article.get("link") or "").hostname or ""
+        parts = host.split(".")
+        for i in range(len(parts) - 1):
+            weight = self.outlet_weights.get(".".join(parts[i:]))
+            if weight is not None:
+                return weight
+        return 1.0
+
+    def keyword_score(self, article):
+        hits = article.get("include_hits") or []
+        if not hits:
+            return 1.0   # 포함 필터가 비어 있는 프로필
+        title = normalize_text(article["title"])
+        description = normalize_text(article.get("description", ""))
+        total = 0.0
+        for keyword in hits:
+            weight = self.keyword_weights.get(keyword, 1.0)
+            norm = self._norm(keyword)
+            pos = title.find(norm)
+            if pos >= 0:
+                total += weight * (1 + TITLE_POSITION_BONUS * (1 - pos / max(1, len(title))))
+            elif norm in description:
+                total += weight * DESCRIPTION_FACTOR
+            else:
+                total += weight * BODY_FACTOR
+        return total
+
+    def recency(self, article):
+        age_hours = max(0.0, (self.now - article["pub_dt"]).total_seconds() / 3600)
+        return RECENCY_FLOOR + (1 - RECENCY_FLOOR) * 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+
+    def score(self, article):
+        return round(self.keyword_score(article) * self.outlet_weight(article) * self.recency(article), 4)
+
+def score_stage(scorer):
+    """파이프라인 extra 단계: 최종 통과 기사에 "score" 를 붙인다"""
+    def fn(a):
+        if a["status"] == STATUS_PASSED:
+            a["score"] = scorer.score(a)
+        return a
+    return item_stage(fn)
+
+def select_top(clusters, k):
+    """
+    유사 묶음 → (본 채널 상위 k 묶음(점수순), 나머지 묶음(들어온 순서)) — 묶음 점수 = 구성 기사 최고 점수.
+    k <= 0 이면 전부. 동점이면 먼저 들어온 묶음이 위
+    """
+    for c in clusters:
+        c["score"] = max(m.get("score", 0.0) for m in c["members"])
+    n = len(clusters) if k <= 0 else k
+    ranked = heapq.nlargest(n, range(len(clusters)), key=lambda i: (clusters[i]["score"], -i))
+    chosen = set(ranked)
+    return [clusters[i] for i in ranked], [c for i, c in enumerate(clusters) if i not in chosen]
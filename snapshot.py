@@ -0,0 +1,119 @@
+# ===============================================
+# snapshot.py — 키워드 런타임 스냅샷 (정규화·컴파일 결과를 파일 하나로, 원본 mtime 으로 무효화)
+# ===============================================
+# 실행마다 키워드 파일 여러 개를 읽고 매처를 컴파일하는 대신, 결과를 pickle 하나로 남겨 두고
+# 다음 실행(재개 / 재시작 / 별도 스크립트)은 원본 파일 stat 만 비교해서 한 번에 읽는다.
+# - 담는 것: 검색어 / 제외 키워드 목록, 포함 키워드 가중치, 언론사 가중치, 컴파일된 매처
+# - 무효화: 기록해 둔 원본 파일(키워드 파일 + 이 데이터를 만드는 코드 파일)의 mtime_ns 가 하나라도 다르면 다시 만든다
+#   (프로필 목록이 바뀌어 새 파일이 필요해도 다시 만든다)
+# - 파일이 없거나 깨졌으면 그냥 다시 만든다 (스냅샷은 캐시일 뿐)
+import os
+import pickle
+
+from keyword_matcher import compile_matcher, load_keywords, load_weighted_keywords
+from scoring import load_outlet_weights
+
+SNAPSHOT_VERSION = 1
+_CODE_FILES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ("keyword_matcher.py", "scoring.py", "snapshot.py")
+]
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class KeywordSnapshot:
+    """프로필들이 쓰는 키워드 파일의 읽은 결과 (get_* 은 스냅샷에 없는 파일이면 그 자리에서 읽는다)"""
+
+    def __init__(self, stamp, keywords, weights, outlets, matchers):
+        self.stamp = stamp          # {path: mtime_ns 또는 None}
+        self.keywords = keywords    # {path: [키워드]} — 검색어 / 제외
+        self.weights = weights      # {path: {키워드: 가중치}} — 포함
+        self.outlets = outlets      # {path: {도메인: 가중치}}
+        self.matchers = matchers    # {(포함 path, 제외 path): KeywordMatcher}
+
+    def fresh(self, paths=()):
+        """기록한 원본이 그대로이고, 필요한 파일(paths)이 모두 들어 있으면 True"""
+        return (all(_mtime_ns(p) == m for p, m in self.stamp.items())
+                and all(p in self.stamp for p in paths))
+
+    def get_keywords(self, path):
+        if path not in self.keywords:
+            self.keywords[path] = load_keywords(path)
+        return self.keywords[path]
+
+    def get_weights(self, path):
+        if path not in self.weights:
+            self.weights[path] = load_weighted_keywords(path)
+        return self.weights[path]
+
+    def get_outlets(self, path):
+        if path not in self.outlets:
+            self.outlets[path] = load_outlet_weights(path)
+        return self.outlets[path]
+
+    def get_matcher(self, include_file, exclude_file):
+        key = (include_file, exclude_file)
+        if key not in self.matchers:
+            self.matchers[key] = compile_matcher(list(self.get_weights(include_file)),
+                                                 self.get_keywords(exclude_file))
+        return self.matchers[key]
+
+def profile_files(profiles):
+    """프로필들이 읽는 원본 파일 경로 (없는 값 제외)"""
+    paths = []
+    for p in profiles:
+        for key in ("search_keywords_file", "filter_keywords_file", "exclude_keywords_file", "outlet_weights_file"):
+            if p.get(key) and p[key] not in paths:
+                paths.append(p[key])
+    return paths
+
+def build_snapshot(profiles):
+    """원본 파일을 읽고 컴파일 (stamp 는 읽기 전에 찍는다 — 읽는 도중 바뀌면 다음 실행에서 다시 만든다)"""
+    stamp = {p: _mtime_ns(p) for p in profile_files(profiles) + _CODE_FILES}
+    snap = KeywordSnapshot(stamp, {}, {}, {}, {})
+    for p in profiles:
+        snap.get_keywords(p["search_keywords_file"])
+        snap.get_matcher(p["filter_keywords_file"], p["exclude_keywords_file"])
+        snap.get_outlets(p.get("outlet_weights_file"))
+    return snap
+
+def read_snapshot(path):
+    """스냅샷 파일 한 번 읽기 (없거나 버전이 다르거나 깨졌으면 None)"""
+    try:
+        with open(path, "rb") as f:
+            version, snap = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print("⚠️ 키워드 스냅샷 읽기 예외 → 다시 만듦:", e)
+        return None
+    return snap if version == SNAPSHOT_VERSION else None
+
+def write_snapshot(path, snap):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump((SNAPSHOT_VERSION, snap), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception as e:
+        print("⚠️ 키워드 스냅샷 기록 예외:", e)
+
+def load_snapshot(path, profiles, current=None):
+    """
+    current(이 프로세스가 들고 있는 스냅샷) → 파일 → 새로 만들기 순으로, 원본이 그대로인 첫 스냅샷.
+    반환: (snapshot, 출처 "memory" / "file" / "built")
+    """
+    paths = profile_files(profiles)
+    if current is not None and current.fresh(paths):
+        return current, "memory"
+    snap = read_snapshot(path) if path else None
+    if snap is not None and snap.fresh(paths):
+        return snap, "file"
+    snap = build_snapshot(profiles)
+    if path:
+        write_snapshot(path, snap)
+    return snap, "built"
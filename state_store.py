@@ -0,0 +1,336 @@
+# ===============================================
+# state_store.py — 상태 저장소 (SQLite WAL): watermark / 발송 기록 / 실행 기록 / 카운터 / 본문 캐시 / 집계 버킷
+# 발송 링크·제목 지문은 프로필(scope)별로 따로 쌓인다 (기본 프로필 scope = "")
+# ===============================================
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sent_links (
+    scope   TEXT NOT NULL DEFAULT '',
+    key     TEXT NOT NULL,
+    sent_at REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS sent_links_sent_at ON sent_links(scope, sent_at);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    scope   TEXT NOT NULL DEFAULT '',
+    fp      TEXT NOT NULL,
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_sent_at ON fingerprints(scope, sent_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT NOT NULL,
+    day   TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (name, day)
+);
+CREATE TABLE IF NOT EXISTS page_cache (
+    url        TEXT PRIMARY KEY,
+    ok         INTEGER NOT NULL,
+    text       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    used_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS page_cache_used_at ON page_cache(used_at);
+CREATE TABLE IF NOT EXISTS agg_buckets (
+    scope  TEXT NOT NULL DEFAULT '',
+    width  INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    label  TEXT NOT NULL DEFAULT '',
+    count  INTEGER NOT NULL,
+    total  REAL NOT NULL DEFAULT 0,
+    peak   REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, width, bucket, metric, label)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind     TEXT NOT NULL,
+    started  TEXT NOT NULL,
+    total_ms REAL,
+    data     TEXT NOT NULL
+);
+"""
+
+RUNS_KEEP = 2000   # 실행 기록 보관 개수
+
+class StateStore:
+    """
+    프로세스 하나에 연결 하나. 쓰기는 transaction() 안에서 한 번에 커밋한다
+    (중첩 호출은 가장 바깥 것만 BEGIN/COMMIT). 밖에서 쓰면 문장 단위 자동 커밋.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            outer = self.depth == 0
+            if outer:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self.depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.depth -= 1
+                if outer:
+                    self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.depth -= 1
+                if outer:
+                    self.conn.execute("COMMIT")
+
+    def _query(self, sql, args=()):
+        with self.lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def _exec(self, sql, args=()):
+        with self.lock:
+            self.conn.execute(sql, args)
+
+    # ── key/value (watermark 등) ──
+    def get(self, key, default=None):
+        rows = self._query("SELECT value FROM kv WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def set(self, key, value):
+        self._exec("INSERT INTO kv(key, value) VALUES (?, ?) "
+                   "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def get_time(self, key):
+        value = self.get(key)
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except ValueError:
+            return None
+
+    def set_time(self, key, dt):
+        self.set(key, dt.isoformat())
+
+    # ── 발송 링크 / 제목 지문 (scope = 프로필, 기본 프로필은 "") ──
+    def sent_seen(self, keys, scope=""):
+        if not keys:
+            return False
+        marks = ",".join("?" * len(keys))
+        return bool(self._query(f"SELECT 1 FROM sent_links WHERE scope = ? AND key IN ({marks}) LIMIT 1",
+                                (scope, *keys)))
+
+    def add_sent(self, keys, ts, scope=""):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO sent_links(scope, key, sent_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(scope, key) DO UPDATE SET sent_at = excluded.sent_at",
+                [(scope, k, ts) for k in keys],
+            )
+
+    def evict_sent(self, cutoff, max_entries, scope=""):
+        with self.lock:
+            self.conn.execute("DELETE FROM sent_links WHERE scope = ? AND sent_at < ?", (scope, cutoff))
+            self.conn.execute(
+                "DELETE FROM sent_links WHERE scope = ? AND key NOT IN "
+                "(SELECT key FROM sent_links WHERE scope = ? ORDER BY sent_at DESC LIMIT ?)",
+                (scope, scope, max_entries))
+
+    def sent_count(self, scope=""):
+        return self._query("SELECT COUNT(*) FROM sent_links WHERE scope = ?", (scope,))[0][0]
+
+    def load_fingerprints(self, cutoff, scope=""):
+        rows = self._query("SELECT fp, sent_at FROM fingerprints WHERE scope = ? AND sent_at >= ? "
+                           "ORDER BY sent_at", (scope, cutoff))
+        return [(int(fp, 16), ts) for fp, ts in rows]
+
+    def add_fingerprints(self, fps, ts, scope=""):
+        with self.lock:
+            self.conn.executemany("INSERT INTO fingerprints(scope, fp, sent_at) VALUES (?, ?, ?)",
+                                  [(scope, f"{fp:016x}", ts) for fp in fps])
+
+    def evict_fingerprints(self, cutoff, max_entries, scope=""):
+        with self.lock:
+            self.conn.execute("DELETE FROM fingerprints WHERE scope = ? AND sent_at < ?", (scope, cutoff))
+            self.conn.execute(
+                "DELETE FROM fingerprints WHERE scope = ? AND rowid NOT IN "
+                "(SELECT rowid FROM fingerprints WHERE scope = ? ORDER BY sent_at DESC LIMIT ?)",
+                (scope, scope, max_entries))
+
+    # ── 기사 본문 캐시 (URL → 추출 텍스트, 실패도 ok=0 으로) ──
+    def get_pages(self, urls, now):
+        """{url: (ok, text, fetched_at)} — 찾은 항목은 used_at 을 갱신 (LRU)"""
+        if not urls:
+            return {}
+        marks = ",".join("?" * len(urls))
+        with self.lock:
+            rows = self.conn.execute(f"SELECT url, ok, text, fetched_at FROM page_cache WHERE url IN ({marks})",
+                                     tuple(urls)).fetchall()
+            if rows:
+                self.conn.executemany("UPDATE page_cache SET used_at = ? WHERE url = ?", [(now, r[0]) for r in rows])
+        return {url: (bool(ok), text, fetched_at) for url, ok, text, fetched_at in rows}
+
+    def put_pages(self, pages, now):
+        """pages = [(url, ok, text)]"""
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO page_cache(url, ok, text, fetched_at, used_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET ok = excluded.ok, text = excluded.text, "
+                "fetched_at = excluded.fetched_at, used_at = excluded.used_at",
+                [(url, int(ok), text, now, now) for url, ok, text in pages],
+            )
+
+    def evict_pages(self, ok_cutoff, fail_cutoff, max_entries):
+        with self.lock:
+            self.conn.execute("DELETE FROM page_cache WHERE (ok = 1 AND fetched_at < ?) OR (ok = 0 AND fetched_at < ?)",
+                              (ok_cutoff, fail_cutoff))
+            self.conn.execute("DELETE FROM page_cache WHERE url NOT IN "
+                              "(SELECT url FROM page_cache ORDER BY used_at DESC LIMIT ?)", (max_entries,))
+
+    # ── 카운터 ──
+    def incr_counter(self, name, day, n):
+        self._exec("INSERT INTO counters(name, day, value) VALUES (?, ?, ?) "
+                   "ON CONFLICT(name, day) DO UPDATE SET value = value + excluded.value", (name, day, n))
+
+    def get_counter(self, name, day):
+        rows = self._query("SELECT value FROM counters WHERE name = ? AND day = ?", (name, day))
+        return rows[0][0] if rows else 0
+
+    # ── 집계 버킷 (bucket = 구간 시작 epoch 초, width = 구간 길이 초) ──
+    def add_buckets(self, rows):
+        """rows = [(scope, width, bucket, metric, label, count, total, peak)] — 같은 칸이면 더한다 (peak 는 최대)"""
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO agg_buckets(scope, width, bucket, metric, label, count, total, peak) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(scope, width, bucket, metric, label) DO UPDATE SET count = count + excluded.count, "
+                "total = total + excluded.total, peak = MAX(peak, excluded.peak)",
+                rows,
+            )
+
+    def sum_buckets(self, since, until, scope=""):
+        """[since, until) 에 시작하는 버킷 합계 → [(metric, label, count, total, peak)] (폭이 섞여 있어도 겹치지 않음)"""
+        return self._query(
+            "SELECT metric, label, SUM(count), SUM(total), MAX(peak) FROM agg_buckets "
+            "WHERE scope = ? AND bucket >= ? AND bucket < ? GROUP BY metric, label",
+            (scope, since, until),
+        )
+
+    def compact_buckets(self, from_width, to_width, cutoff, offset, keep_cutoff):
+        """
+        cutoff 이전 from_width 버킷을 to_width 버킷으로 합치고(경계 = (bucket + offset) 의 배수 - offset),
+        keep_cutoff 이전 버킷은 모두 지운다. 반환: 합친 행 수
+        """
+        with self.lock:
+            n = self.conn.execute("SELECT COUNT(*) FROM agg_buckets WHERE width = ? AND bucket < ?",
+                                  (from_width, cutoff)).fetchone()[0]
+            self.conn.execute(
+                "INSERT INTO agg_buckets(scope, width, bucket, metric, label, count, total, peak) "
+                "SELECT scope, ?, ((bucket + ?) / ?) * ? - ?, metric, label, SUM(count), SUM(total), MAX(peak) "
+                "FROM agg_buckets WHERE width = ? AND bucket < ? GROUP BY 1, 3, 4, 5 "
+                "ON CONFLICT(scope, width, bucket, metric, label) DO UPDATE SET count = count + excluded.count, "
+                "total = total + excluded.total, peak = MAX(peak, excluded.peak)",
+                (to_width, offset, to_width, to_width, offset, from_width, cutoff),
+            )
+            self.conn.execute("DELETE FROM agg_buckets WHERE width = ? AND bucket < ?", (from_width, cutoff))
+            self.conn.execute("DELETE FROM agg_buckets WHERE bucket < ?", (keep_cutoff,))
+        return n
+
+    # ── 실행 기록 ──
+    def add_run(self, run):
+        with self.lock:
+            self.conn.execute("INSERT INTO runs(kind, started, total_ms, data) VALUES (?, ?, ?, ?)",
+                              (run["kind"], run["started"], run.get("total_ms"),
+                               json.dumps(run, ensure_ascii=False)))
+            self.conn.execute("DELETE FROM runs WHERE id <= (SELECT MAX(id) FROM runs) - ?", (RUNS_KEEP,))
+
+    def recent_runs(self, last_n):
+        rows = self._query("SELECT data FROM runs ORDER BY id DESC LIMIT ?", (last_n,))
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+# ─────────────────────────────────────────────
+# 기존 파일 → 저장소 1회 이전
+# ─────────────────────────────────────────────
+def _read_text(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def migrate_legacy(store, last_sent_file=None, last_checked_file=None, sent_log_files=(),
+                   fingerprint_file=None, call_count_file=None, metrics_file=None, canonical=None):
+    """
+    처음 한 번만: 텍스트/JSON 상태 파일을 읽어 저장소에 넣는다 (원본 파일은 그대로 둔다).
+    sent_log_files 는 우선순위 순 (영구 저장소 파일 → 저장소 기본 목록), 먼저 읽힌 것 하나만 사용.
+    """
+    if store.get("migrated_at"):
+        return False
+    now = time.time()
+    with store.transaction():
+        for key, path in (("last_sent", last_sent_file), ("last_checked", last_checked_file)):
+            value = _read_text(path) if path else None
+            if value:
+                try:
+                    datetime.fromisoformat(value)
+                    store.set(key, value)
+                except ValueError:
+                    pass
+
+        for path in sent_log_files:
+            data = _read_json(path) if path else None
+            if data is None:
+                continue
+            pairs = data.items() if isinstance(data, dict) else ((url, now) for url in data)
+            rows = []
+            for url, ts in pairs:
+                key = url if url.startswith("naver:") or canonical is None else canonical(url)
+                if key:
+                    rows.append((key, float(ts)))
+            for key, ts in rows:
+                store.add_sent([key], ts)
+            break
+
+        data = _read_json(fingerprint_file) if fingerprint_file else None
+        for fp, ts in data or []:
+            store.add_fingerprints([int(fp, 16)], float(ts))
+
+        data = _read_json(call_count_file) if call_count_file else None
+        if isinstance(data, dict) and data.get("date"):
+            store.incr_counter("naver_calls", data["date"], int(data.get("naver_calls", 0)))
+
+        if metrics_file and os.path.exists(metrics_file):
+            with open(metrics_file, "r", encoding="utf-8") as f:
+                for line in f.readlines()[-RUNS_KEEP:]:
+                    try:
+                        store.add_run(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+
+        store.set("migrated_at", datetime.now().isoformat())
+    print("📦 기존 상태 파일 → 저장소 이전 완료")
+    return True